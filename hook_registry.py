@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Hook registry builder.
+Reconciles the hook declarations in .claude-plugin/plugin.json and
+hooks/hooks.json into a single resolved dispatch table (hooks/registry.json)
+so the plugin never has to probe for hook scripts at startup.
+"""
+
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+PLUGIN_JSON = Path('.claude-plugin/plugin.json')
+HOOKS_JSON = Path('hooks/hooks.json')
+REGISTRY_JSON = Path('hooks/registry.json')
+REGISTRY_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    """
+    Hash a hook script.
+
+    Args:
+        path: Path to the script
+
+    Returns:
+        str: Hex-encoded SHA-256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _normalize(script: str) -> str:
+    """Normalize a declared script path ('./hooks/x.js' -> 'hooks/x.js')."""
+    return Path(script).as_posix() if script else ''
+
+
+def load_declarations(root: Path = Path('.')) -> dict:
+    """
+    Collect hook declarations from both manifests.
+
+    Args:
+        root: Plugin root directory
+
+    Returns:
+        dict: event -> {'plugin.json': {...} | None, 'hooks.json': {...} | None}
+    """
+    declarations = {}
+
+    plugin_path = root / PLUGIN_JSON
+    if plugin_path.exists():
+        with open(plugin_path, 'r') as f:
+            plugin = json.load(f)
+        for event, script in (plugin.get('hooks') or {}).items():
+            declarations.setdefault(event, {'plugin.json': None, 'hooks.json': None})
+            declarations[event]['plugin.json'] = {'script': _normalize(script)}
+
+    hooks_path = root / HOOKS_JSON
+    if hooks_path.exists():
+        with open(hooks_path, 'r') as f:
+            hooks = json.load(f)
+        for event, spec in hooks.items():
+            if isinstance(spec, str):
+                spec = {'script': spec}
+            declarations.setdefault(event, {'plugin.json': None, 'hooks.json': None})
+            declarations[event]['hooks.json'] = {
+                'script': _normalize(spec.get('script', '')),
+                'enabled': spec.get('enabled', True),
+                'description': spec.get('description', ''),
+            }
+
+    return declarations
+
+
+def build_registry(root: Path = Path('.')) -> dict:
+    """
+    Resolve hook declarations into a dispatch table.
+
+    plugin.json is the manifest the host loads, so its script wins when it
+    exists; hooks.json supplies the enabled flag and description and is used
+    as a fallback script. Events whose scripts are all missing are left out of
+    the dispatch table and listed under 'unresolved'.
+
+    Args:
+        root: Plugin root directory
+
+    Returns:
+        dict: Registry with 'hooks', 'unresolved' and 'issues' keys
+    """
+    registry = {'version': REGISTRY_VERSION, 'hooks': {}, 'unresolved': [], 'issues': []}
+
+    for event, sources in sorted(load_declarations(root).items()):
+        from_plugin = sources['plugin.json']
+        from_hooks = sources['hooks.json']
+        enabled = from_hooks['enabled'] if from_hooks else True
+        description = from_hooks['description'] if from_hooks else ''
+
+        candidates = []
+        for source, decl in (('plugin.json', from_plugin), ('hooks.json', from_hooks)):
+            if decl is None:
+                registry['issues'].append(f"{event}: not declared in {source}")
+            elif decl['script']:
+                candidates.append((source, decl['script']))
+
+        if from_plugin and from_hooks and from_plugin['script'] != from_hooks['script']:
+            registry['issues'].append(
+                f"{event}: plugin.json declares {from_plugin['script']} "
+                f"but hooks.json declares {from_hooks['script']}"
+            )
+
+        resolved = None
+        for source, script in candidates:
+            if (root / script).is_file():
+                if resolved is None:
+                    resolved = (source, script)
+            else:
+                registry['issues'].append(f"{event}: {source} script {script} does not exist")
+
+        if resolved is None:
+            registry['unresolved'].append(event)
+            continue
+
+        source, script = resolved
+        registry['hooks'][event] = {
+            'script': script,
+            'sha256': file_sha256(root / script),
+            'enabled': enabled,
+            'description': description,
+            'source': source,
+        }
+
+    return registry
+
+
+def check_registry(root: Path = Path('.')) -> list:
+    """
+    Compare the committed registry with a fresh build.
+
+    Args:
+        root: Plugin root directory
+
+    Returns:
+        list: Human-readable differences (empty when up to date)
+    """
+    path = root / REGISTRY_JSON
+    if not path.exists():
+        return [f"{REGISTRY_JSON} not found"]
+
+    with open(path, 'r') as f:
+        current = json.load(f)
+    fresh = build_registry(root)
+
+    differences = []
+    current_hooks = current.get('hooks', {})
+    for event in sorted(set(current_hooks) | set(fresh['hooks'])):
+        old = current_hooks.get(event)
+        new = fresh['hooks'].get(event)
+        if old is None:
+            differences.append(f"{event}: missing from registry")
+        elif new is None:
+            differences.append(f"{event}: stale entry for {old.get('script')}")
+        elif old != new:
+            changed = sorted(k for k in set(old) | set(new) if old.get(k) != new.get(k))
+            differences.append(f"{event}: {', '.join(changed)} changed")
+    return differences
+
+
+def write_registry(registry: dict, root: Path = Path('.')) -> Path:
+    """Write the registry as stable, diff-friendly JSON."""
+    path = root / REGISTRY_JSON
+    with open(path, 'w') as f:
+        json.dump(registry, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return path
+
+
+def main():
+    """Build, write or check the hook registry."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--root', default='.', help='Plugin root directory')
+    parser.add_argument('--write', action='store_true', help=f'Write {REGISTRY_JSON}')
+    parser.add_argument('--check', action='store_true', help=f'Fail if {REGISTRY_JSON} is out of date')
+    args = parser.parse_args()
+    root = Path(args.root)
+
+    if args.check:
+        differences = check_registry(root)
+        for difference in differences:
+            print(f"  - {difference}")
+        print(f"Registry: {'STALE' if differences else 'UP TO DATE'}")
+        return 1 if differences else 0
+
+    registry = build_registry(root)
+    for event, entry in registry['hooks'].items():
+        print(f"{event}: {entry['script']} ({entry['sha256'][:12]})")
+    for event in registry['unresolved']:
+        print(f"{event}: UNRESOLVED")
+    for issue in registry['issues']:
+        print(f"  - {issue}")
+
+    if args.write:
+        print(f"Wrote {write_registry(registry, root)}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,8 @@ import os
 import json
 from pathlib import Path
 
+from hook_registry import build_registry, check_registry
+
 class PluginValidator:
     def __init__(self):
         self.errors = []
@@ -150,13 +152,17 @@ class PluginValidator:
             else:
                 self.warnings.append("⚠️  hooks.json not found")
 
-            # Check hook implementations
-            hooks = ['on-load.js', 'on-skill-invoke.js']
-            for hook in hooks:
-                if Path(f'hooks/{hook}').exists():
-                    self.successes.append(f"✅ Hook {hook} found")
-                else:
-                    self.warnings.append(f"⚠️  Hook {hook} not found")
+            # Reconcile plugin.json and hooks.json declarations
+            registry = build_registry()
+            for event, entry in registry['hooks'].items():
+                self.successes.append(f"✅ Hook {event} resolved to {entry['script']}")
+            for event in registry['unresolved']:
+                self.errors.append(f"Hook {event} has no existing script")
+            for issue in registry['issues']:
+                self.warnings.append(f"⚠️  Hook {issue}")
+
+            for difference in check_registry():
+                self.warnings.append(f"⚠️  hooks/registry.json out of date: {difference}")
 
         except Exception as e:
             self.errors.append(f"Error validating hooks: {str(e)}")
@@ -0,0 +1,192 @@
+"""
+Pytest plugin that collects the "Unit Test Template" blocks in SKILL.md files.
+
+Each test_* function in a template becomes a real test item, marked with
+skill_<name> (e.g. ``pytest -m skill_clustering``). Each template block runs
+in its own namespace, seeded with the imports and helpers from the earlier
+blocks in the same SKILL.md, with the skill's scripts/ directory on
+sys.path. Items that passed against the current content hash (SKILL.md plus
+the scripts/ modules its templates import) are skipped on later runs unless
+--skill-templates-all is given. The items are ordinary pytest items, so
+pytest-xdist (``-n auto``) distributes them across workers.
+
+Templates that call a helper the SKILL.md never defines (a placeholder for
+the reader's own code) are reported as xfail; any other NameError fails.
+A block whose imports are not installed skips only its own tests.
+
+Usage:
+    python -m pytest -p pytest_skill_templates skills/
+    python -m pytest -p pytest_skill_templates skills/ -m skill_clustering -n auto
+"""
+
+import ast
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from snippet_harness import assemble_prelude, extract_snippets, scripts_digest, scripts_path_setup
+
+CACHE_PREFIX = 'skill_templates'
+
+
+def skill_marker(skill: str) -> str:
+    """Marker name for a skill ('ml-deployment' -> 'skill_ml_deployment')."""
+    return 'skill_' + skill.replace('-', '_')
+
+
+def imported_names(source: str) -> set:
+    """Names bound by import statements anywhere in a block of source."""
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                names.add(alias.asname or alias.name.split('.')[0])
+    return names
+
+
+def bound_names(source: str) -> set:
+    """Names a block of source defines anywhere (defs, classes, assignments, imports)."""
+    names = imported_names(source)
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+    return names
+
+
+def referenced_names(node) -> set:
+    """Names a function body reads."""
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('skill-templates')
+    group.addoption(
+        '--skill-templates-all',
+        action='store_true',
+        default=False,
+        help='Run SKILL.md unit test templates even if their content is unchanged since they last passed',
+    )
+
+
+def pytest_configure(config):
+    for skill_md in sorted(Path(config.rootpath, 'skills').glob('*/SKILL.md')):
+        marker = skill_marker(skill_md.parent.name)
+        config.addinivalue_line('markers', f"{marker}: unit test templates from {skill_md.parent.name}/SKILL.md")
+
+
+def pytest_collect_file(file_path, parent):
+    if file_path.name == 'SKILL.md':
+        return SkillTemplateFile.from_parent(parent, path=file_path)
+    return None
+
+
+class SkillTemplateFile(pytest.File):
+    """A SKILL.md file; yields one item per templated test function."""
+
+    def collect(self):
+        snippets = extract_snippets(self.path)
+        templates = [s for s in snippets if s.kind == 'test']
+        if not templates:
+            return
+
+        skill = self.path.parent.name
+        self.base_namespace = None
+        self.namespaces = {}
+        # Templates may import the skill's scripts/ modules, as the prose does
+        self.prelude = '\n'.join([scripts_path_setup(self.path),
+                                   assemble_prelude([s for s in snippets if s.kind == 'example'])])
+        content_hash = hashlib.sha256(
+            self.path.read_bytes()
+            + scripts_digest(self.path, '\n'.join([self.prelude] + [s.code for s in templates])).encode()
+        ).hexdigest()
+        self.template_codes = []
+        self.defined = set()
+        for snippet in snippets:
+            try:
+                self.defined |= bound_names(snippet.code)
+            except SyntaxError:
+                pass
+
+        for snippet in templates:
+            # Shift line numbers so tracebacks point into SKILL.md
+            tree = ast.parse(snippet.code, filename=str(self.path))
+            ast.increment_lineno(tree, snippet.line - 1)
+            self.template_codes.append(compile(tree, str(self.path), 'exec'))
+
+            for node in tree.body:
+                if isinstance(node, ast.FunctionDef) and node.name.startswith('test_'):
+                    item = SkillTemplateItem.from_parent(
+                        self, name=node.name, lineno=node.lineno, content_hash=content_hash,
+                        block=len(self.template_codes) - 1, referenced=referenced_names(node),
+                    )
+                    item.add_marker(skill_marker(skill))
+                    yield item
+
+    def load_namespace(self, block: int) -> dict:
+        """Execute the prelude once per file and each template block once, on first use."""
+        if self.base_namespace is None:
+            namespace = {'__name__': f"skill_templates.{self.path.parent.name}"}
+            exec(compile(self.prelude, f"{self.path}:prelude", 'exec'), namespace)
+            self.unavailable = imported_names(self.prelude) - set(namespace)
+            self.base_namespace = namespace
+        if block not in self.namespaces:
+            # A copy per block, so one block's missing module does not skip the others
+            namespace = dict(self.base_namespace)
+            try:
+                exec(self.template_codes[block], namespace)
+            except ModuleNotFoundError as e:
+                namespace = f"missing module {e.name}"
+            self.namespaces[block] = namespace
+        if isinstance(self.namespaces[block], str):
+            pytest.skip(self.namespaces[block])
+        return self.namespaces[block]
+
+
+class SkillTemplateItem(pytest.Item):
+    """One test_* function from a SKILL.md Unit Test Template."""
+
+    def __init__(self, *, lineno, content_hash, block=0, referenced=frozenset(), **kwargs):
+        super().__init__(**kwargs)
+        self.lineno = lineno
+        self.content_hash = content_hash
+        self.block = block
+        self.referenced = referenced
+
+    @property
+    def cache_key(self) -> str:
+        return f"{CACHE_PREFIX}/{self.nodeid}"
+
+    @property
+    def cache(self):
+        # None under -p no:cacheprovider
+        return getattr(self.config, 'cache', None)
+
+    def setup(self):
+        if not self.config.getoption('skill_templates_all') and self.cache is not None:
+            if self.cache.get(self.cache_key, None) == self.content_hash:
+                pytest.skip('SKILL.md and its scripts unchanged since last pass')
+
+    def runtest(self):
+        namespace = self.parent.load_namespace(self.block)
+        try:
+            namespace[self.name]()
+        except ModuleNotFoundError as e:
+            pytest.skip(f"missing module {e.name}")
+        except NameError as e:
+            if e.name in self.parent.unavailable:
+                pytest.skip(f"import providing {e.name!r} is not installed")
+            # Only a name the test itself uses and the SKILL.md never defines is a
+            # placeholder; anything else (typos, broken helpers) is a real failure
+            if e.name in self.referenced and e.name not in self.parent.defined:
+                pytest.xfail(f"template placeholder: {e.name!r} is not defined in {self.path.parent.name}/SKILL.md")
+            raise
+        if self.cache is not None:
+            self.cache.set(self.cache_key, self.content_hash)
+
+    def reportinfo(self):
+        return self.path, self.lineno - 1, f"{self.path.parent.name}::{self.name}"
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Parallel, warm-started optimal-K search for the clustering skill.
+Drop-in replacement for find_optimal_k in SKILL.md that scales to large n:
+candidate k values are split into contiguous runs evaluated across a process
+pool, each fit warm-starts from the previous k's centroids, MiniBatchKMeans
+takes over for large datasets and silhouette is estimated on a stratified
+sample with a confidence bound instead of the full O(n^2) computation.
+"""
+
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import calinski_harabasz_score, silhouette_samples
+
+MINIBATCH_THRESHOLD = 100_000
+SILHOUETTE_SAMPLE_SIZE = 10_000
+SEEDING_SAMPLE_SIZE = 10_000
+Z_95 = 1.959964
+
+
+def stratified_sample(labels, sample_size, rng):
+    """
+    Draw a sample with each cluster represented in proportion to its size.
+
+    Args:
+        labels: Cluster label per row
+        sample_size: Total rows to draw
+        rng: numpy Generator
+
+    Returns:
+        np.ndarray: Sorted row indices
+    """
+    n = len(labels)
+    if n <= sample_size:
+        return np.arange(n)
+
+    clusters, counts = np.unique(labels, return_counts=True)
+    # At least two rows per cluster so every sampled point has a neighbour
+    quota = np.maximum(2, np.round(counts / n * sample_size).astype(int))
+    quota = np.minimum(quota, counts)
+
+    picks = [
+        rng.choice(np.flatnonzero(labels == cluster), size=q, replace=False)
+        for cluster, q in zip(clusters, quota)
+    ]
+    return np.sort(np.concatenate(picks))
+
+
+def sampled_silhouette(X, labels, sample_size=SILHOUETTE_SAMPLE_SIZE, rng=None):
+    """
+    Estimate the silhouette score on a stratified sample.
+
+    Args:
+        X: Data matrix
+        labels: Cluster label per row
+        sample_size: Rows used for the estimate
+        rng: numpy Generator
+
+    Returns:
+        tuple: (mean silhouette, 95% confidence half-width; 0.0 when exact)
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    idx = stratified_sample(labels, sample_size, rng)
+    if len(np.unique(labels[idx])) < 2:
+        return float('nan'), float('nan')
+
+    scores = silhouette_samples(X[idx], labels[idx])
+    if len(idx) == len(labels):
+        return float(scores.mean()), 0.0
+    return float(scores.mean()), float(Z_95 * scores.std(ddof=1) / np.sqrt(len(scores)))
+
+
+def _next_centers(X, centers, rng, sample_size=SEEDING_SAMPLE_SIZE):
+    """Extend a k-center solution to k+1 with one k-means++ (D^2) draw."""
+    idx = rng.choice(len(X), size=min(len(X), sample_size), replace=False)
+    sample = X[idx]
+    d2 = ((sample[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+    total = d2.sum()
+    if total <= 0:
+        choice = rng.integers(len(sample))
+    else:
+        choice = rng.choice(len(sample), p=d2 / total)
+    return np.vstack([centers, sample[choice]])
+
+
+def _evaluate_run(X, ks, random_state, n_init, minibatch_threshold, sample_size):
+    """Fit a contiguous run of k values, warm-starting each from the last."""
+    rng = np.random.default_rng([random_state, ks[0]])
+    use_minibatch = len(X) >= minibatch_threshold
+    results = []
+    centers = None
+
+    for k in ks:
+        if centers is None:
+            init, runs = 'k-means++', n_init
+        else:
+            init, runs = _next_centers(X, centers, rng), 1
+
+        if use_minibatch:
+            model = MiniBatchKMeans(
+                n_clusters=k, init=init, n_init=runs, batch_size=4096, random_state=random_state,
+            )
+        else:
+            model = KMeans(n_clusters=k, init=init, n_init=runs, random_state=random_state)
+        labels = model.fit_predict(X)
+        centers = model.cluster_centers_
+
+        silhouette, ci = sampled_silhouette(X, labels, sample_size, rng)
+        results.append({
+            'k': k,
+            'inertia': float(model.inertia_),
+            'silhouette': silhouette,
+            'silhouette_ci': ci,
+            'calinski': float(calinski_harabasz_score(X, labels)),
+        })
+    return results
+
+
+def _split_runs(K, n_runs):
+    """Split K into n_runs contiguous, near-equal runs."""
+    return [list(chunk) for chunk in np.array_split(np.asarray(K), n_runs) if len(chunk)]
+
+
+def find_optimal_k(X, max_k=15, min_k=2, n_jobs=None, random_state=42, n_init=10,
+                   minibatch_threshold=MINIBATCH_THRESHOLD, sample_size=SILHOUETTE_SAMPLE_SIZE):
+    """
+    Find optimal number of clusters.
+
+    Args:
+        X: Scaled data matrix (n_samples, n_features)
+        max_k: Largest k to try
+        min_k: Smallest k to try
+        n_jobs: Worker processes (default: CPU count; 1 runs in-process)
+        random_state: Seed for fits and sampling
+        n_init: Restarts for the first (cold) fit of each run
+        minibatch_threshold: Rows at which MiniBatchKMeans replaces KMeans
+        sample_size: Rows used for the silhouette estimate
+
+    Returns:
+        tuple: (optimal_k, metrics) where metrics has 'inertia', 'silhouette'
+            and 'calinski' lists aligned with range(min_k, max_k + 1), plus
+            'silhouette_ci' (95% half-width of each silhouette estimate)
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    if min_k < 2 or max_k < min_k:
+        raise ValueError("Need 2 <= min_k <= max_k")
+    if max_k >= len(X):
+        raise ValueError(f"max_k={max_k} must be smaller than n_samples={len(X)}")
+
+    K = range(min_k, max_k + 1)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(K))
+    runs = _split_runs(K, n_jobs)
+    args = (random_state, n_init, minibatch_threshold, sample_size)
+
+    if n_jobs == 1:
+        chunks = [_evaluate_run(X, ks, *args) for ks in runs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(_evaluate_run, X, ks, *args) for ks in runs]
+            chunks = [future.result() for future in futures]
+
+    results = [r for chunk in chunks for r in chunk]
+    metrics = {
+        key: [r[key] for r in results]
+        for key in ('inertia', 'silhouette', 'calinski', 'silhouette_ci')
+    }
+
+    optimal_k = K[int(np.nanargmax(metrics['silhouette']))]
+    return optimal_k, metrics
+
+
+def main():
+    """Run the search on a .npy file and print the metrics table."""
+    parser = argparse.ArgumentParser(description="Find the optimal number of clusters")
+    parser.add_argument('data', help='Path to a 2D .npy array (already scaled)')
+    parser.add_argument('--max-k', type=int, default=15)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    X = np.load(args.data, mmap_mode='r')
+    optimal_k, metrics = find_optimal_k(X, max_k=args.max_k, n_jobs=args.n_jobs)
+
+    print(f"{'k':>3} {'inertia':>14} {'silhouette':>16} {'calinski':>12}")
+    for i, k in enumerate(range(2, args.max_k + 1)):
+        print(f"{k:>3} {metrics['inertia'][i]:>14.2f} "
+              f"{metrics['silhouette'][i]:>8.4f} ± {metrics['silhouette_ci'][i]:<6.4f} "
+              f"{metrics['calinski'][i]:>12.2f}")
+    print(f"\nOptimal k: {optimal_k}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Streaming classification evaluation for the computer-vision skill.
+evaluate_classifier in the skill and agent extends Python lists with every
+prediction and label, then calls classification_report at the end, so both
+memory and time grow with the dataset. ClassificationMetrics adds each
+batch into a preallocated confusion matrix (one bincount) plus top-k hit
+counters, and computes precision, recall, F1 and accuracy from those
+counts. Memory is O(classes^2) however many images are evaluated.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from segmentation_metrics import _to_numpy, confusion_matrix
+
+
+class ClassificationMetrics:
+    """Accumulate a classification confusion matrix and top-k hits across batches."""
+
+    def __init__(self, num_classes, class_names=None, top_k=(5,)):
+        """
+        Args:
+            num_classes: Number of classes
+            class_names: Names for the report (default: class ids)
+            top_k: Extra k values for top-k accuracy (needs score outputs)
+        """
+        self.num_classes = num_classes
+        self.class_names = list(class_names) if class_names is not None else [str(i) for i in range(num_classes)]
+        self.top_k = tuple(k for k in top_k if 1 < k <= num_classes)
+        self.confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+        self.topk_hits = {k: 0 for k in self.top_k}
+        self.topk_count = 0
+
+    def update(self, outputs, labels):
+        """
+        Add a batch.
+
+        Args:
+            outputs: (N, C) logits/probabilities or (N,) predicted class ids
+            labels: (N,) true class ids
+        """
+        labels_np = _to_numpy(labels).ravel()
+        # Unlike segmentation void pixels, an out-of-range class id is a bug in the caller
+        self._check_ids(labels_np, 'labels')
+        if len(outputs.shape) == 2:
+            if self.top_k:
+                if hasattr(outputs, 'topk'):
+                    # Torch: sorted top-k on device, only (N, k) ids come back
+                    top = _to_numpy(outputs.topk(max(self.top_k), dim=1).indices)
+                    for k in self.top_k:
+                        self.topk_hits[k] += int((top[:, :k] == labels_np[:, None]).any(axis=1).sum())
+                else:
+                    scores = np.asarray(outputs)
+                    label_scores = scores[np.arange(len(labels_np)), labels_np]
+                    # Rank = number of classes scoring strictly higher than the label
+                    ranks = (scores > label_scores[:, None]).sum(axis=1)
+                    for k in self.top_k:
+                        self.topk_hits[k] += int((ranks < k).sum())
+                self.topk_count += len(labels_np)
+            preds = _to_numpy(outputs.argmax(1))
+        else:
+            preds = _to_numpy(outputs)
+            self._check_ids(preds, 'predictions')
+        self.confusion += confusion_matrix(labels_np, preds.ravel(), self.num_classes)
+        return self
+
+    def _check_ids(self, ids, what):
+        if ids.size and (ids.min() < 0 or ids.max() >= self.num_classes):
+            bad = ids[(ids < 0) | (ids >= self.num_classes)]
+            raise ValueError(f"{what} must be class ids in [0, {self.num_classes}), got {bad[:5].tolist()}")
+
+    def merge(self, other):
+        """Fold in another accumulator (e.g. from a data-parallel worker)."""
+        self.confusion += other.confusion
+        for k in self.top_k:
+            self.topk_hits[k] += other.topk_hits[k]
+        self.topk_count += other.topk_count
+        return self
+
+    def reset(self):
+        self.confusion[:] = 0
+        self.topk_hits = {k: 0 for k in self.top_k}
+        self.topk_count = 0
+
+    def compute(self):
+        """
+        Metrics from the accumulated counts.
+
+        Returns:
+            dict: per-class 'precision', 'recall', 'f1', 'support' arrays,
+                'predicted' counts, 'accuracy', 'macro_f1' (over present
+                labels), 'weighted_f1', 'top{k}_accuracy' and the
+                'confusion_matrix'
+        """
+        cm = self.confusion.astype(np.float64)
+        tp = np.diag(cm)
+        support = cm.sum(axis=1)
+        predicted = cm.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Zero where undefined, as classification_report(zero_division=0)
+            precision = np.where(predicted > 0, tp / predicted, 0.0)
+            recall = np.where(support > 0, tp / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+        total = support.sum()
+        # Like sklearn, macro averages cover only labels seen in truth or predictions
+        present = (support > 0) | (predicted > 0)
+        result = {
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+            'support': support.astype(np.int64),
+            'predicted': predicted.astype(np.int64),
+            'accuracy': float(tp.sum() / total) if total else 0.0,
+            'macro_f1': float(f1[present].mean()) if present.any() else 0.0,
+            'weighted_f1': float((f1 * support).sum() / total) if total else 0.0,
+            'confusion_matrix': self.confusion.copy(),
+        }
+        for k in self.top_k:
+            result[f"top{k}_accuracy"] = self.topk_hits[k] / self.topk_count if self.topk_count else 0.0
+        return result
+
+    def report(self, labels=None):
+        """
+        Same dict as classification_report(..., output_dict=True, zero_division=0).
+
+        Args:
+            labels: Class ids to report and average over. Default: the labels
+                present in the ground truth or the predictions, as sklearn does
+                (classes absent from a split do not dilute the macro average)
+
+        Returns:
+            dict: Per-class entries, 'accuracy' ('micro avg' when labels leave
+                out a present class), 'macro avg' and 'weighted avg'
+        """
+        m = self.compute()
+        present = np.flatnonzero((m['support'] > 0) | (m['predicted'] > 0))
+        ids = present if labels is None else np.asarray(labels, dtype=np.int64)
+        report = {
+            self.class_names[i]: {'precision': float(m['precision'][i]), 'recall': float(m['recall'][i]),
+                                  'f1-score': float(m['f1'][i]), 'support': int(m['support'][i])}
+            for i in ids
+        }
+        support = m['support'][ids]
+        total = int(support.sum())
+        if set(present.tolist()) <= set(ids.tolist()):
+            report['accuracy'] = m['accuracy']
+        else:
+            tp = int(np.diag(self.confusion)[ids].sum())
+            predicted = int(m['predicted'][ids].sum())
+            precision = tp / predicted if predicted else 0.0
+            recall = tp / total if total else 0.0
+            report['micro avg'] = {
+                'precision': precision, 'recall': recall,
+                'f1-score': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+                'support': total,
+            }
+        for avg, weights in (('macro avg', None), ('weighted avg', support)):
+            defined = len(ids) > 0 and (weights is None or total > 0)
+            report[avg] = {
+                metric: float(np.average(m[key][ids], weights=weights)) if defined else 0.0
+                for metric, key in (('precision', 'precision'), ('recall', 'recall'), ('f1-score', 'f1'))
+            }
+            report[avg]['support'] = total
+        return report
+
+
+def evaluate_classifier(model, dataloader, class_names, device='cuda', top_k=(5,)):
+    """Streaming drop-in for the agent's evaluate_classifier."""
+    import torch
+
+    model.eval()
+    metrics = ClassificationMetrics(len(class_names), class_names, top_k)
+    with torch.no_grad():
+        for images, labels in dataloader:
+            outputs = model(images.to(device, non_blocking=True))
+            metrics.update(outputs, labels.to(device, non_blocking=True))
+
+    report = metrics.report()
+    result = metrics.compute()
+    return {
+        'classification_report': report,
+        'confusion_matrix': result['confusion_matrix'],
+        'accuracy': report['accuracy'],
+        'macro_f1': report['macro avg']['f1-score'],
+        **{key: value for key, value in result.items() if key.startswith('top')},
+    }
+
+
+def main():
+    """Check against sklearn on synthetic logits and compare with the list-based path."""
+    from sklearn.metrics import classification_report, top_k_accuracy_score
+
+    rng = np.random.default_rng(0)
+    num_classes, n, batch = 100, 200_000, 256
+    labels = rng.integers(0, num_classes, size=n)
+    logits = rng.standard_normal((n, num_classes)).astype(np.float32)
+    logits[np.arange(n), labels] += 2.0
+
+    start = time.perf_counter()
+    metrics = ClassificationMetrics(num_classes)
+    for i in range(0, n, batch):
+        metrics.update(logits[i:i + batch], labels[i:i + batch])
+    ours = metrics.report()
+    stream_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    all_preds, all_labels = [], []
+    for i in range(0, n, batch):
+        all_preds.extend(logits[i:i + batch].argmax(1))
+        all_labels.extend(labels[i:i + batch])
+    reference = classification_report(all_labels, all_preds, output_dict=True, zero_division=0)
+    list_time = time.perf_counter() - start
+
+    assert abs(ours['accuracy'] - reference['accuracy']) < 1e-12
+    assert abs(ours['macro avg']['f1-score'] - reference['macro avg']['f1-score']) < 1e-9
+    assert abs(metrics.compute()['top5_accuracy'] - top_k_accuracy_score(labels, logits, k=5)) < 1e-9
+    print(f"lists + classification_report: {list_time:.2f} s, streaming: {stream_time:.2f} s")
+    print(f"accuracy {ours['accuracy']:.4f}, macro F1 {ours['macro avg']['f1-score']:.4f}, "
+          f"top-5 {metrics.compute()['top5_accuracy']:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped decoded-image cache for the computer-vision skill.
+ImagePreprocessor.__call__ in the computer-vision agent decodes every image
+with Image.open(...).convert('RGB') on every access, then resizes it.
+Validation images go through the same deterministic Resize + Normalize every
+epoch. build_image_cache() decodes and resizes each image once, in a process
+pool, into one uint8 (N, H, W, 3) memory-mapped array. CachedImageDataset
+serves rows of that array:
+
+- items are views of the mapping, so DataLoader workers share the OS page
+  cache instead of each holding decoded copies. After the first epoch, reads
+  do not touch the image files at all;
+- the mapping is opened lazily in each worker process and never pickled;
+- Normalize is a per-channel affine map of the uint8 pixels. It is applied
+  on access (normalize=True, same output as the val transform), or per
+  batch on the device with normalize_batch, which also sends 4x fewer bytes
+  to the GPU;
+- a transform, e.g. ImagePreprocessor(size, 'train'), still receives the
+  decoded array, so random augmentations skip the decode too;
+- a list of indices (DataLoader with a BatchSampler and batch_size=None)
+  returns one gathered batch with sorted reads.
+
+Cache layout (<cache_dir>/<images fingerprint>-<labels fingerprint>/). The
+images fingerprint covers image size, resize method and every source file's
+path, size and mtime; the labels fingerprint covers the label values, so a
+relabelled dataset gets its own directory. It hard-links (or copies)
+images.bin from a sibling with the same images rather than decoding again:
+
+    meta.json     count, image_size, dtype, layout
+    images.bin    (n, H, W, 3) uint8, row i decoded from paths[i]
+    paths.json    index: source path of each row
+    labels.npy    (n,) int64 labels (when given)
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+def load_resized(path, image_size):
+    """Decode to RGB like ImagePreprocessor, then resize like A.Resize (bilinear)."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = np.array(image.convert('RGB'))
+    try:
+        import cv2
+
+        # albumentations' Resize is cv2.resize with INTER_LINEAR
+        return cv2.resize(image, (image_size, image_size), interpolation=cv2.INTER_LINEAR)
+    except ImportError:
+        return np.array(Image.fromarray(image).resize((image_size, image_size), Image.BILINEAR))
+
+
+def cache_fingerprint(paths, image_size, load_fn=load_resized):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image_size}\0{load_fn.__module__}.{load_fn.__qualname__}\0".encode())
+    for path in paths:
+        stat = os.stat(path)
+        h.update(f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return h.hexdigest()
+
+
+def labels_fingerprint(labels):
+    if labels is None:
+        return 'unlabeled'
+    labels = np.ascontiguousarray(labels, dtype=np.int64)
+    return hashlib.blake2b(labels.tobytes(), digest_size=8).hexdigest()
+
+
+def _reuse_images(cache_dir, images_fingerprint, target):
+    """Link images.bin from a finished cache with the same images; False if none."""
+    for name in sorted(os.listdir(cache_dir)):
+        source = os.path.join(cache_dir, name)
+        if name.startswith(images_fingerprint + '-') and os.path.exists(os.path.join(source, 'meta.json')):
+            try:
+                # images.bin is never written after publishing, so sharing the inode is safe
+                os.link(os.path.join(source, 'images.bin'), target)
+            except OSError:
+                shutil.copyfile(os.path.join(source, 'images.bin'), target)
+            return True
+    return False
+
+
+_worker = {}
+
+
+def _init_worker(images_path, shape, image_size, load_fn):
+    _worker['images'] = np.memmap(images_path, dtype=np.uint8, mode='r+', shape=shape)
+    _worker['image_size'] = image_size
+    _worker['load_fn'] = load_fn
+
+
+def _decode_chunk(rows, paths):
+    images = _worker['images']
+    for row, path in zip(rows, paths):
+        try:
+            images[row] = _worker['load_fn'](path, _worker['image_size'])
+        except Exception as e:
+            raise RuntimeError(f"Failed to cache {path}: {e}") from e
+    images.flush()
+    return len(rows)
+
+
+def _decode_all(paths, images_path, shape, image_size, load_fn, num_workers, chunk_size):
+    # Sized up front; rows are filled in place by the workers
+    np.memmap(images_path, dtype=np.uint8, mode='w+', shape=(max(int(np.prod(shape)), 1),)).flush()
+    chunks = [(list(range(start, min(start + chunk_size, len(paths)))), paths[start:start + chunk_size])
+              for start in range(0, len(paths), chunk_size)]
+    num_workers = os.cpu_count() if num_workers is None else num_workers
+    if num_workers and len(chunks) > 1:
+        with ProcessPoolExecutor(num_workers, initializer=_init_worker,
+                                 initargs=(images_path, shape, image_size, load_fn)) as pool:
+            for _ in pool.map(_decode_chunk, *zip(*chunks)):
+                pass
+    else:
+        _init_worker(images_path, shape, image_size, load_fn)
+        for rows, chunk_paths in chunks:
+            _decode_chunk(rows, chunk_paths)
+        _worker.clear()
+
+
+def build_image_cache(paths, cache_dir, image_size=224, labels=None, num_workers=None,
+                      chunk_size=64, load_fn=load_resized):
+    """
+    Decode and resize images once into a memory-mapped cache.
+
+    Args:
+        paths: Image file paths (row order of the cache)
+        cache_dir: Root cache directory
+        image_size: Square output size (the val transform's Resize)
+        labels: Optional int label per image
+        num_workers: Decode processes (default: CPU count; 0 decodes inline)
+        chunk_size: Images per worker task
+        load_fn: Picklable (path, image_size) -> (image_size, image_size, 3) uint8
+
+    Returns:
+        str: Cache directory (reused when images and labels are unchanged)
+    """
+    paths = [os.fspath(p) for p in paths]
+    if labels is not None and len(labels) != len(paths):
+        raise ValueError(f"Got {len(labels)} labels for {len(paths)} images")
+    images_fingerprint = cache_fingerprint(paths, image_size, load_fn)
+    path = os.path.join(cache_dir, f"{images_fingerprint}-{labels_fingerprint(labels)}")
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        return path
+
+    shape = (len(paths), image_size, image_size, 3)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.image-cache-', dir=cache_dir)
+    try:
+        images_path = os.path.join(tmp, 'images.bin')
+        if not _reuse_images(cache_dir, images_fingerprint, images_path):
+            _decode_all(paths, images_path, shape, image_size, load_fn, num_workers, chunk_size)
+
+        with open(os.path.join(tmp, 'paths.json'), 'w') as f:
+            json.dump(paths, f)
+        if labels is not None:
+            np.save(os.path.join(tmp, 'labels.npy'), np.asarray(labels, dtype=np.int64))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'count': len(paths), 'image_size': image_size, 'dtype': 'uint8',
+                       'layout': 'NHWC', 'load_fn': f"{load_fn.__module__}.{load_fn.__qualname__}"}, f)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # Another process published the same fingerprint first
+            shutil.rmtree(tmp)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return path
+
+
+def _affine(mean, std):
+    """Per-channel scale and bias with (x / 255 - mean) / std == x * scale + bias."""
+    std = np.asarray(std, dtype=np.float32)
+    return 1.0 / (255.0 * std), -np.asarray(mean, dtype=np.float32) / std
+
+
+def normalize_batch(images, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+    """
+    uint8 (B, H, W, 3) -> normalized float32 (B, 3, H, W).
+
+    Accepts numpy arrays or torch tensors; pass tensors already on the GPU
+    so the transfer moves uint8 instead of float32.
+    """
+    scale, bias = _affine(mean, std)
+    if hasattr(images, 'permute'):
+        import torch
+
+        scale = torch.as_tensor(scale, device=images.device).view(1, 3, 1, 1)
+        bias = torch.as_tensor(bias, device=images.device).view(1, 3, 1, 1)
+        return torch.addcmul(bias, images.permute(0, 3, 1, 2).float(), scale)
+    out = images.transpose(0, 3, 1, 2).astype(np.float32)
+    out *= scale[:, None, None]
+    out += bias[:, None, None]
+    return out
+
+
+class CachedImageDataset:
+    """Map-style dataset over a build_image_cache() directory."""
+
+    def __init__(self, path, transform=None, normalize=True, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+        """
+        Args:
+            path: Cache directory from build_image_cache
+            transform: Callable on the (H, W, 3) uint8 array, e.g.
+                ImagePreprocessor(size, 'train'); overrides normalize
+            normalize: Return normalized float32 CHW (the val transform's
+                output) instead of the uint8 HWC view
+            mean: Normalization mean per channel
+            std: Normalization std per channel
+        """
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, 'paths.json'), 'r') as f:
+            self.paths = json.load(f)
+        labels_path = os.path.join(path, 'labels.npy')
+        self.labels = np.load(labels_path) if os.path.exists(labels_path) else None
+        self.path = path
+        self.transform = transform
+        self.normalize = normalize
+        self.mean, self.std = mean, std
+        size = self.meta['image_size']
+        self.shape = (self.meta['count'], size, size, 3)
+        self._images = None
+        self._rows = None
+
+    @property
+    def images(self):
+        # Opened per process: DataLoader workers map the same file
+        if self._images is None:
+            # Copy-on-write keeps the views writable (torch.from_numpy warns on
+            # read-only arrays) without ever copying unmodified pages
+            self._images = np.memmap(os.path.join(self.path, 'images.bin'), dtype=np.uint8,
+                                     mode='c', shape=self.shape)
+        return self._images
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+
+    def __len__(self):
+        return self.shape[0]
+
+    def index_of(self, image_path):
+        """Row of a source path."""
+        if self._rows is None:
+            self._rows = {p: i for i, p in enumerate(self.paths)}
+        return self._rows[os.fspath(image_path)]
+
+    def __getitem__(self, index):
+        """
+        One image (view), or a gathered batch for a list of indices.
+
+        Returns:
+            image, or (image, label) when the cache has labels
+        """
+        if np.ndim(index) == 0:
+            image = self.images[index]
+            if self.transform is not None:
+                image = self.transform(image)
+            elif self.normalize:
+                image = normalize_batch(image[None], self.mean, self.std)[0]
+        else:
+            index = np.asarray(index, dtype=np.int64)
+            # Gather in file order, then restore the requested order
+            order = np.argsort(index, kind='stable')
+            image = np.empty((len(index),) + self.shape[1:], dtype=np.uint8)
+            image[order] = self.images[index[order]]
+            if self.transform is not None:
+                image = [self.transform(im) for im in image]
+            elif self.normalize:
+                image = normalize_batch(image, self.mean, self.std)
+        if self.labels is None:
+            return image
+        return image, self.labels[index]
+
+
+def _val_transform(path, image_size, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+    """ImagePreprocessor(mode='val') per access: decode, resize, normalize."""
+    image = load_resized(path, image_size).astype(np.float32) / 255.0
+    image = (image - np.asarray(mean, dtype=np.float32)) / np.asarray(std, dtype=np.float32)
+    return image.transpose(2, 0, 1)
+
+
+def main():
+    """Compare per-epoch decoding with the memory-mapped cache on synthetic JPEGs."""
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    n, image_size, epochs = 1_000, 224, 3
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(n):
+            # Smooth gradients plus noise: compresses like a photo, not like static
+            base = np.linspace(0, 255, 500, dtype=np.float32)[None, :, None] * rng.random(3)
+            pixels = np.clip(base + rng.normal(0, 12, (375, 500, 3)), 0, 255).astype(np.uint8)
+            paths.append(os.path.join(tmp, f"{i:05d}.jpg"))
+            Image.fromarray(pixels).save(paths[-1], quality=90)
+        labels = rng.integers(0, 10, n)
+
+        start = time.perf_counter()
+        for _ in range(epochs):
+            reference = [_val_transform(p, image_size) for p in paths]
+        decode_epoch = (time.perf_counter() - start) / epochs
+
+        start = time.perf_counter()
+        path = build_image_cache(paths, os.path.join(tmp, 'cache'), image_size, labels=labels)
+        build = time.perf_counter() - start
+
+        dataset = CachedImageDataset(path)
+        start = time.perf_counter()
+        for _ in range(epochs):
+            for batch in range(0, n, 64):
+                images, _ = dataset[np.arange(batch, min(batch + 64, n))]
+        cached_epoch = (time.perf_counter() - start) / epochs
+
+        error = max(float(np.abs(dataset[i][0] - reference[i]).max()) for i in range(0, n, 97))
+        print(f"{n} images -> {image_size}px: decode every epoch {decode_epoch:.2f} s/epoch, "
+              f"cache build {build:.2f} s once, cached {cached_epoch:.3f} s/epoch "
+              f"({decode_epoch / cached_epoch:.0f}x), max abs diff {error:.1e}, "
+              f"{os.path.getsize(os.path.join(path, 'images.bin')) / 2**20:.0f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
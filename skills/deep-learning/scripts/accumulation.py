@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Gradient-accumulation planning for the deep-learning skill.
+find_batch_size() in batch_size_finder.py measures the largest micro-batch
+that fits in memory; plan_accumulation() turns it and a target effective
+batch size into (micro-batch size, accumulation steps) for
+train_epoch_accumulated(). It does not import torch.
+"""
+
+import sys
+import math
+
+
+def plan_accumulation(max_fit, target_batch_size):
+    """
+    Micro-batch size and accumulation steps for a target effective batch.
+
+    Prefers a micro-batch that divides the target exactly, allowing up to
+    twice the minimum number of steps (target 256 with max_fit 96 gives
+    64 x 4). When no such divisor exists (e.g. a prime target), it uses the
+    fewest steps with balanced micro-batches, and the effective batch
+    micro x steps slightly exceeds the target.
+
+    Returns:
+        tuple: (micro_batch_size, accumulation_steps)
+    """
+    if max_fit < 1 or target_batch_size < 1:
+        raise ValueError(f"max_fit and target_batch_size must be >= 1, got {max_fit} and {target_batch_size}")
+    if target_batch_size <= max_fit:
+        return target_batch_size, 1
+    min_steps = math.ceil(target_batch_size / max_fit)
+    for steps in range(min_steps, 2 * min_steps + 1):
+        if target_batch_size % steps == 0:
+            return target_batch_size // steps, steps
+    return math.ceil(target_batch_size / min_steps), min_steps
+
+
+def main():
+    """Print accumulation plans for a few memory limits and targets."""
+    for max_fit, target in [(512, 256), (96, 256), (200, 1024), (100, 257), (48, 1000)]:
+        micro, steps = plan_accumulation(max_fit, target)
+        print(f"fits {max_fit:>4}, target {target:>5}: {micro:>4} x {steps} = {micro * steps}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
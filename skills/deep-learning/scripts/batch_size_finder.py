@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Batch-size finder and gradient accumulation for the deep-learning skill.
+The skill's train_epoch and the agent's train_model use whatever batch size
+the DataLoader was built with, so users find the largest one that fits by
+trial and error. find_batch_size() probes it instead:
+
+- each probe runs real training steps (forward, backward, optimizer.step)
+  at one batch size and records the peak memory and samples/sec;
+- memory is torch.cuda.max_memory_reserved on CUDA. Without a GPU it is the
+  process RSS, sampled on a background thread during the probe, with
+  malloc_trim between probes so freed memory does not inflate the next
+  reading;
+- batch sizes double until a probe exceeds the budget (or raises OOM), then
+  a binary search narrows the gap to `multiple_of`. On CPU a size whose
+  linearly extrapolated memory is far over budget is rejected without
+  running it, so a probe never pushes the machine into swap;
+- model and optimizer state are restored afterwards.
+
+plan_accumulation() (accumulation.py) turns the largest fitting size and a
+target effective batch size into (micro-batch size, accumulation steps).
+train_epoch_accumulated() then trains with that plan, stepping the
+optimizer once per accumulation group.
+
+Usage:
+
+    plan = find_batch_size(model, batch_from_dataset(train_ds), optimizer, criterion,
+                           device, target_batch_size=1024)
+    loader = DataLoader(train_ds, batch_size=plan['batch_size'], shuffle=True)
+    train_epoch_accumulated(model, loader, optimizer, criterion, device,
+                            accumulation_steps=plan['accumulation_steps'])
+"""
+
+import gc
+import os
+import sys
+import time
+import ctypes
+import threading
+
+import torch
+import torch.nn as nn
+
+from accumulation import plan_accumulation
+from checkpoint import snapshot_state
+from training_engine import Prefetcher, ThroughputMeter
+
+
+def current_rss():
+    """Resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import psutil
+
+        return psutil.Process().memory_info().rss
+
+
+def available_memory():
+    """Bytes of RAM available to allocate (MemAvailable on Linux)."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import psutil
+
+    return psutil.virtual_memory().available
+
+
+def _release_memory(device):
+    gc.collect()
+    if device.type == 'cuda':
+        torch.cuda.empty_cache()
+        return
+    try:
+        # Return freed heap pages to the OS so the next RSS reading is honest
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class CudaMemoryMonitor:
+    """Peak reserved CUDA memory over a probe."""
+
+    def __init__(self, device):
+        self.device = device
+
+    def default_budget(self):
+        return int(torch.cuda.get_device_properties(self.device).total_memory * 0.9)
+
+    def start(self):
+        torch.cuda.synchronize(self.device)
+        torch.cuda.reset_peak_memory_stats(self.device)
+
+    def stop(self):
+        torch.cuda.synchronize(self.device)
+        return torch.cuda.max_memory_reserved(self.device)
+
+
+class RSSMonitor:
+    """Peak process RSS over a probe, sampled every `interval` seconds."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self._peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def default_budget(self):
+        return current_rss() + int(available_memory() * 0.8)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, current_rss())
+
+    def start(self):
+        self._peak = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name='rss-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return max(self._peak, current_rss())
+
+
+def _is_oom(error):
+    if isinstance(error, getattr(torch.cuda, 'OutOfMemoryError', ())):
+        return True
+    message = str(error).lower()
+    return isinstance(error, RuntimeError) and ('out of memory' in message or "can't allocate memory" in message)
+
+
+def batch_from_dataset(dataset):
+    """make_batch(batch_size) -> (inputs, targets) drawn from a map-style dataset."""
+    def make_batch(batch_size):
+        indices = [i % len(dataset) for i in range(batch_size)]
+        return torch.utils.data.default_collate([dataset[i] for i in indices])
+    return make_batch
+
+
+def probe(model, make_batch, optimizer, criterion, device, batch_size, monitor, steps=3):
+    """
+    Run warm-up + `steps` training steps at one batch size.
+
+    Returns:
+        tuple: (peak memory bytes, samples/sec)
+    """
+    if steps < 1:
+        raise ValueError(f"steps must be >= 1, got {steps}")
+    inputs, targets = (t.to(device) for t in make_batch(batch_size))
+    monitor.start()
+    try:
+        for step in range(steps + 1):
+            if step == 1:  # first step allocates optimizer state and warms kernels
+                if device.type == 'cuda':
+                    torch.cuda.synchronize(device)
+                start = time.perf_counter()
+            optimizer.zero_grad(set_to_none=True)
+            loss = criterion(model(inputs), targets)
+            loss.backward()
+            optimizer.step()
+        if device.type == 'cuda':
+            torch.cuda.synchronize(device)
+        elapsed = time.perf_counter() - start
+    finally:
+        peak = monitor.stop()
+    return peak, batch_size * steps / elapsed
+
+
+def find_batch_size(model, make_batch, optimizer, criterion, device, target_batch_size=None,
+                    memory_budget=None, start=8, max_batch_size=None, multiple_of=8, steps=3,
+                    log_fn=print):
+    """
+    Largest batch size whose training step fits the memory budget.
+
+    Args:
+        model: nn.Module (already on device)
+        make_batch: Callable batch_size -> (inputs, targets) on CPU
+        optimizer: Optimizer (its state is restored afterwards)
+        criterion: Loss function
+        device: Training device
+        target_batch_size: Effective batch size to reach (also caps probing)
+        memory_budget: Peak bytes allowed (default: 90% of GPU memory, or
+            current RSS + 80% of available RAM)
+        start: First batch size probed
+        max_batch_size: Upper bound on probing (default: target_batch_size or 65536)
+        multiple_of: Granularity of the binary search
+        steps: Timed steps per probe
+        log_fn: Callable receiving one line per probe (None for silence)
+
+    Returns:
+        dict: 'batch_size', 'accumulation_steps', 'effective_batch_size',
+        'samples_per_sec' (at batch_size), 'memory_budget' and 'probes'
+        (list of {'batch_size', 'peak_mb', 'samples_per_sec', 'fits', 'status'})
+    """
+    if steps < 1:
+        raise ValueError(f"steps must be >= 1, got {steps}")
+    device = torch.device(device)
+    monitor = CudaMemoryMonitor(device) if device.type == 'cuda' else RSSMonitor()
+    budget = memory_budget or monitor.default_budget()
+    max_batch_size = max_batch_size or target_batch_size or 65_536
+    probes = []
+
+    def measure(batch_size):
+        _release_memory(device)
+        try:
+            peak, throughput = probe(model, make_batch, optimizer, criterion, device, batch_size, monitor, steps)
+        except Exception as e:
+            if not _is_oom(e):
+                raise
+            return {'batch_size': batch_size, 'peak_mb': float('nan'), 'samples_per_sec': 0.0,
+                    'fits': False, 'status': 'oom'}
+        finally:
+            optimizer.zero_grad(set_to_none=True)
+        return {'batch_size': batch_size, 'peak_mb': peak / 2 ** 20, 'samples_per_sec': throughput,
+                'fits': peak <= budget, 'status': 'ok' if peak <= budget else 'over budget'}
+
+    def run(batch_size):
+        record = None
+        fitted = sorted((p for p in probes if p['status'] == 'ok'), key=lambda p: p['batch_size'])
+        if device.type != 'cuda' and len(fitted) >= 2:
+            # Linear extrapolation from the two largest fitting probes
+            (b0, m0), (b1, m1) = [(p['batch_size'], p['peak_mb']) for p in fitted[-2:]]
+            predicted = m1 + (m1 - m0) / max(b1 - b0, 1) * (batch_size - b1)
+            if predicted * 2 ** 20 > 1.25 * budget:
+                record = {'batch_size': batch_size, 'peak_mb': predicted, 'samples_per_sec': 0.0,
+                          'fits': False, 'status': 'predicted'}
+        if record is None:
+            record = measure(batch_size)
+        probes.append(record)
+        if log_fn:
+            log_fn(f"batch {batch_size:>6}: {record['status']:<11} peak {record['peak_mb']:8.0f} MiB, "
+                   f"{record['samples_per_sec']:8.0f} samples/s")
+        return record
+
+    saved = snapshot_state({'model': model.state_dict(), 'optimizer': optimizer.state_dict()},
+                           buffers=None)
+    if device.type == 'cuda':
+        torch.cuda.synchronize(device)
+    was_training = model.training
+    model.train()
+    try:
+        good, bad = 0, None
+        batch_size = min(start, max_batch_size)
+        while True:
+            if run(batch_size)['fits']:
+                good = batch_size
+                if batch_size >= max_batch_size:
+                    break
+                batch_size = min(batch_size * 2, max_batch_size)
+            else:
+                bad = batch_size
+                break
+        while bad is not None and bad - good > multiple_of:
+            middle = (good + bad) // 2 // multiple_of * multiple_of
+            if middle <= good:
+                break
+            if run(middle)['fits']:
+                good = middle
+            else:
+                bad = middle
+    finally:
+        model.load_state_dict(saved['model'])
+        optimizer.load_state_dict(saved['optimizer'])
+        model.train(was_training)
+        del saved
+        _release_memory(device)
+
+    if good == 0:
+        raise RuntimeError(f"No batch size >= {min(start, max_batch_size)} fits in "
+                           f"{budget / 2 ** 20:.0f} MiB; lower start or raise memory_budget")
+    batch_size, accumulation_steps = plan_accumulation(good, target_batch_size or good)
+    fitted = {p['batch_size']: p['samples_per_sec'] for p in probes if p['fits']}
+    plan = {
+        'batch_size': batch_size,
+        'accumulation_steps': accumulation_steps,
+        'effective_batch_size': batch_size * accumulation_steps,
+        'samples_per_sec': fitted.get(batch_size, fitted[good]),
+        'memory_budget': budget,
+        'probes': probes,
+    }
+    if log_fn:
+        log_fn(f"plan: batch {batch_size} x {accumulation_steps} accumulation steps "
+               f"= {plan['effective_batch_size']} effective")
+        if target_batch_size and plan['effective_batch_size'] != target_batch_size:
+            log_fn(f"note: effective batch {plan['effective_batch_size']} differs from "
+                   f"target {target_batch_size} (no divisor fits in memory)")
+    return plan
+
+
+def train_epoch_accumulated(model, loader, optimizer, criterion, device, accumulation_steps=1,
+                            scaler=None, clip_grad_norm=None, prefetch=2):
+    """
+    One epoch with gradient accumulation over `accumulation_steps` micro-batches.
+
+    A trailing partial group's gradients are rescaled to a full-group mean
+    before its optimizer step.
+
+    Returns:
+        dict: 'loss' (per-sample mean), 'samples_per_sec', 'optimizer_steps'
+    """
+    device = torch.device(device)
+    model.train()
+    batches = Prefetcher(loader, device, prefetch) if prefetch else loader
+    meter = ThroughputMeter()
+    loss_sum = torch.zeros((), device=device)
+    optimizer_steps = 0
+    pending = 0
+
+    def step():
+        if pending != accumulation_steps:
+            for p in model.parameters():
+                if p.grad is not None:
+                    p.grad.mul_(accumulation_steps / pending)
+        if scaler is not None:
+            if clip_grad_norm:
+                scaler.unscale_(optimizer)
+                nn.utils.clip_grad_norm_(model.parameters(), clip_grad_norm)
+            scaler.step(optimizer)
+            scaler.update()
+        else:
+            if clip_grad_norm:
+                nn.utils.clip_grad_norm_(model.parameters(), clip_grad_norm)
+            optimizer.step()
+        optimizer.zero_grad(set_to_none=True)
+
+    optimizer.zero_grad(set_to_none=True)
+    for batch_x, batch_y in batches:
+        if not prefetch:
+            batch_x, batch_y = batch_x.to(device), batch_y.to(device)
+        with torch.autocast(device_type=device.type, enabled=scaler is not None):
+            loss = criterion(model(batch_x), batch_y)
+        scaled = loss / accumulation_steps
+        (scaler.scale(scaled) if scaler is not None else scaled).backward()
+
+        n = batch_x.shape[0]
+        loss_sum += loss.detach() * n
+        meter.update(n)
+        pending += 1
+        if pending == accumulation_steps:
+            step()
+            optimizer_steps += 1
+            pending = 0
+    if pending:
+        step()
+        optimizer_steps += 1
+
+    return {
+        'loss': loss_sum.item() / max(meter.samples, 1),
+        'samples_per_sec': meter.samples_per_sec,
+        'optimizer_steps': optimizer_steps,
+    }
+
+
+def main():
+    """Find the batch size for a small convnet, then train one epoch with the plan."""
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    torch.manual_seed(0)
+    images = torch.randn(4_096, 3, 64, 64)
+    labels = torch.randint(0, 10, (len(images),))
+    dataset = torch.utils.data.TensorDataset(images, labels)
+
+    model = nn.Sequential(
+        nn.Conv2d(3, 64, 3, padding=1), nn.ReLU(),
+        nn.Conv2d(64, 128, 3, padding=1), nn.ReLU(), nn.MaxPool2d(2),
+        nn.Conv2d(128, 128, 3, padding=1), nn.ReLU(), nn.AdaptiveAvgPool2d(1),
+        nn.Flatten(), nn.Linear(128, 10),
+    ).to(device)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-3)
+    criterion = nn.CrossEntropyLoss()
+
+    # A deliberately small budget so the demo exercises accumulation
+    budget = (2 * 2 ** 30 if device.type == 'cuda' else current_rss() + 1 * 2 ** 30)
+    plan = find_batch_size(model, batch_from_dataset(dataset), optimizer, criterion, device,
+                           target_batch_size=1_024, memory_budget=budget)
+
+    loader = torch.utils.data.DataLoader(dataset, batch_size=plan['batch_size'], shuffle=True)
+    stats = train_epoch_accumulated(model, loader, optimizer, criterion, device,
+                                    accumulation_steps=plan['accumulation_steps'])
+    print(f"epoch: loss {stats['loss']:.4f}, {stats['samples_per_sec']:.0f} samples/s, "
+          f"{stats['optimizer_steps']} optimizer steps")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Asynchronous checkpointing for the deep-learning skill.
+save_checkpoint in the skill and the best-model save in the deep-learning
+agent's train_model call torch.save inside the epoch loop. Training stops
+while the whole state dict is serialized and written, which takes seconds for
+large models, and a crash mid-write leaves a truncated best_model.pt.
+
+CheckpointManager splits a save in two:
+
+- on the training thread, the state dict is copied into CPU buffers that are
+  reused across saves. On CUDA the buffers are pinned, the copies are
+  non-blocking, and there is one synchronize at the end. This copy is the
+  only part that blocks training;
+- on a background thread the snapshot is serialized to a temp file, fsynced,
+  and published with os.replace. Then manifest.json is rewritten the same
+  way, and rotation deletes checkpoints that are neither among the last
+  keep_last nor the best keep_best by the tracked metric.
+
+A file is visible under its final name only once it is complete, so
+restore() can always load the newest consistent checkpoint. If that file
+still fails to load, it falls back to the next newest. The manifest and
+rotation bookkeeping lives in checkpoint_manifest.py, which does not need
+torch; a directory reopened with a different mode is refused.
+
+Usage:
+
+    ckpt = CheckpointManager('checkpoints', keep_last=3, keep_best=1, mode='max')
+    state = ckpt.restore(model, optimizer)      # None on a fresh run
+    start_epoch = state['epoch'] + 1 if state else 0
+    for epoch in range(start_epoch, epochs):
+        ...
+        ckpt.save({'epoch': epoch, 'model_state_dict': model.state_dict(),
+                   'optimizer_state_dict': optimizer.state_dict()}, step=epoch, metric=val_acc)
+    ckpt.close()                                 # wait for the last write
+"""
+
+import os
+import sys
+import copy
+import time
+import argparse
+import tempfile
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+import torch.nn as nn
+
+from checkpoint_manifest import (checkpoint_name, manifest_bytes, rank_checkpoints, read_manifest,
+                                 select_checkpoints)
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # e.g. Windows cannot open directories
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, write_fn):
+    """Call write_fn(file) on a temp file next to path, fsync, then os.replace."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(directory)
+
+
+def snapshot_state(obj, buffers=None, key=()):
+    """
+    Copy every tensor in a (nested) state dict to CPU.
+
+    Args:
+        obj: State dict, or any nest of dicts/lists/tuples of tensors and values
+        buffers: Dict of CPU tensors reused across calls, keyed by position in the nest
+        key: Position of obj in the nest (internal)
+
+    Returns:
+        Same structure, with CPU tensors that no longer alias training state.
+        Call torch.cuda.synchronize() before reading it if the source was on CUDA.
+    """
+    if buffers is None:
+        buffers = {}
+    if torch.is_tensor(obj):
+        buffer = buffers.get(key)
+        if buffer is None or buffer.shape != obj.shape or buffer.dtype != obj.dtype:
+            buffer = torch.empty(obj.shape, dtype=obj.dtype, device='cpu', pin_memory=obj.is_cuda)
+            buffers[key] = buffer
+        buffer.copy_(obj.detach(), non_blocking=obj.is_cuda)
+        return buffer
+    if isinstance(obj, dict):
+        return type(obj)((k, snapshot_state(v, buffers, key + (k,))) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot_state(v, buffers, key + (i,)) for i, v in enumerate(obj))
+    # Hyperparameters in optimizer param_groups are mutated by schedulers
+    return copy.deepcopy(obj)
+
+
+class CheckpointManager:
+    """Non-blocking torch checkpoints with atomic writes, rotation and resume."""
+
+    def __init__(self, directory, keep_last=3, keep_best=1, mode=None, reuse_buffers=True):
+        """
+        Args:
+            directory: Checkpoint directory (created if missing)
+            keep_last: Most recent checkpoints to keep
+            keep_best: Best checkpoints (by metric) to keep in addition
+            mode: 'min' or 'max', whether lower or higher metrics are better
+                (default: the mode stored in the directory's manifest, else 'min').
+                Raises ValueError if it conflicts with the stored mode
+            reuse_buffers: Keep CPU snapshot buffers between saves (faster,
+                costs one model-sized CPU copy)
+        """
+        self.directory = directory
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        os.makedirs(directory, exist_ok=True)
+        self.entries, self.mode = read_manifest(directory, mode)
+        self._buffers = {} if reuse_buffers else None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        self._pending = None
+        self._remove_stale_temp_files()
+        self.saves = 0
+        self.blocking_seconds = 0.0
+        self.write_seconds = 0.0
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, 'manifest.json')
+
+    def save(self, state, step, metric=None):
+        """
+        Snapshot state and write it in the background.
+
+        Blocks only for the device-to-CPU copy, plus any still-running
+        previous write (the snapshot buffers are reused). Errors from a
+        background write are raised here, or by wait().
+
+        Args:
+            state: Dict to torch.save (state dicts, epoch, ...)
+            step: Monotonic step or epoch number; names the file
+            metric: Value ranked by mode for keep_best (optional)
+
+        Returns:
+            Future resolving to the checkpoint path
+        """
+        start = time.perf_counter()
+        self.wait()
+        snapshot = snapshot_state(state, self._buffers)
+        if torch.cuda.is_available() and torch.cuda.is_initialized():
+            torch.cuda.synchronize()
+        self._pending = self._executor.submit(self._write, snapshot, int(step), metric)
+        self.blocking_seconds += time.perf_counter() - start
+        self.saves += 1
+        return self._pending
+
+    def wait(self):
+        """Block until the last save is on disk; re-raise its error if it failed."""
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            pending.result()
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def latest(self):
+        """Path of the newest checkpoint, or None."""
+        return os.path.join(self.directory, self.entries[-1]['file']) if self.entries else None
+
+    def best(self):
+        """Path of the best checkpoint by metric, or None."""
+        ranked = self._ranked()
+        return os.path.join(self.directory, ranked[0]['file']) if ranked else None
+
+    def restore(self, model=None, optimizer=None, map_location='cpu', which='latest'):
+        """
+        Load the newest (or best) checkpoint that reads back cleanly.
+
+        Args:
+            model: Module to load 'model_state_dict' into (optional)
+            optimizer: Optimizer to load 'optimizer_state_dict' into (optional)
+            map_location: torch.load map_location
+            which: 'latest' or 'best'
+
+        Returns:
+            dict: The loaded checkpoint, or None when there is none
+        """
+        self.wait()
+        candidates = self._ranked() if which == 'best' else list(reversed(self.entries))
+        for entry in candidates:
+            path = os.path.join(self.directory, entry['file'])
+            try:
+                state = torch.load(path, map_location=map_location)
+            except Exception as e:  # missing or unreadable: fall back to the next one
+                warnings.warn(f"Skipping checkpoint {path}: {e}")
+                continue
+            if model is not None:
+                model.load_state_dict(state['model_state_dict'])
+            if optimizer is not None:
+                optimizer.load_state_dict(state['optimizer_state_dict'])
+            return state
+        return None
+
+    def stats(self) -> dict:
+        return {
+            'saves': self.saves,
+            'checkpoints': len(self.entries),
+            'mean_blocking_ms': self.blocking_seconds / self.saves * 1000 if self.saves else 0.0,
+            'mean_write_ms': self.write_seconds / self.saves * 1000 if self.saves else 0.0,
+        }
+
+    def _write(self, snapshot, step, metric):
+        # Runs on the single writer thread, so entries and the manifest are not shared
+        start = time.perf_counter()
+        name = checkpoint_name(step)
+        path = os.path.join(self.directory, name)
+        atomic_write(path, lambda f: torch.save(snapshot, f))
+
+        entries = [e for e in self.entries if e['file'] != name]
+        entries.append({'file': name, 'step': step,
+                        'metric': None if metric is None else float(metric), 'time': time.time()})
+        self.entries, removed = select_checkpoints(entries, self.keep_last, self.keep_best, self.mode,
+                                                   keep={name})
+
+        # Publish the manifest before deleting, so it never names a missing file
+        atomic_write(self.manifest_path, lambda f: f.write(manifest_bytes(self.entries, self.mode)))
+        for entry in removed:
+            try:
+                os.remove(os.path.join(self.directory, entry['file']))
+            except FileNotFoundError:
+                pass
+        self.write_seconds += time.perf_counter() - start
+        return path
+
+    def _ranked(self):
+        return rank_checkpoints(self.entries, self.mode)
+
+    def _remove_stale_temp_files(self):
+        for name in os.listdir(self.directory):
+            if name.startswith('.') and name.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+def save_checkpoint(model, optimizer, epoch, val_loss, path):
+    """The skill's synchronous save, for comparison."""
+    torch.save({
+        'epoch': epoch,
+        'model_state_dict': model.state_dict(),
+        'optimizer_state_dict': optimizer.state_dict(),
+        'val_loss': val_loss
+    }, path)
+
+
+def main():
+    """Time how long a save blocks training: torch.save vs. CheckpointManager."""
+    parser = argparse.ArgumentParser(description="Checkpoint benchmark")
+    parser.add_argument('--width', type=int, default=2_048)
+    parser.add_argument('--layers', type=int, default=8)
+    parser.add_argument('--saves', type=int, default=5)
+    args = parser.parse_args()
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    model = nn.Sequential(*[nn.Linear(args.width, args.width) for _ in range(args.layers)]).to(device)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-3)
+    model(torch.randn(4, args.width, device=device)).sum().backward()
+    optimizer.step()  # materialize Adam moments
+    n_params = sum(p.numel() for p in model.parameters())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for epoch in range(args.saves):
+            save_checkpoint(model, optimizer, epoch, 1.0 / (epoch + 1), os.path.join(tmp, 'best_model.pt'))
+        sync = (time.perf_counter() - start) / args.saves
+
+        with CheckpointManager(os.path.join(tmp, 'ckpt'), keep_last=2, keep_best=1, mode='min') as ckpt:
+            for epoch in range(args.saves):
+                ckpt.save({'epoch': epoch, 'model_state_dict': model.state_dict(),
+                           'optimizer_state_dict': optimizer.state_dict()},
+                          step=epoch, metric=[0.5, 0.3, 0.4, 0.6, 0.7][epoch % 5])
+                time.sleep(sync * 1.5)  # stand-in for an epoch of training
+            ckpt.wait()
+            stats = ckpt.stats()
+            files = sorted(e['file'] for e in ckpt.entries)
+
+            resumed = CheckpointManager(os.path.join(tmp, 'ckpt'))
+            state = resumed.restore(model, optimizer)
+            resumed.close()
+
+    print(f"{n_params / 1e6:.0f}M params on {device.type}: torch.save blocks {sync * 1000:.0f} ms/save, "
+          f"CheckpointManager blocks {stats['mean_blocking_ms']:.0f} ms/save "
+          f"(background write {stats['mean_write_ms']:.0f} ms)")
+    print(f"kept {files}; resumed from epoch {state['epoch']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
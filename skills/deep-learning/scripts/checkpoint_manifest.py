@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Checkpoint manifest and rotation policy for CheckpointManager.
+checkpoint.py writes and loads the files; this module decides which
+checkpoints a directory holds, how they rank and which ones rotation keeps.
+It does not import torch, so the bookkeeping can be checked on its own.
+
+manifest.json records the ranking mode next to the checkpoint list. A
+directory written with mode='max' and reopened with mode='min' would rank
+its checkpoints backwards, and rotation would delete the best one, so
+read_manifest() refuses a conflicting mode.
+"""
+
+import os
+import re
+import sys
+import json
+import tempfile
+
+CHECKPOINT_PATTERN = re.compile(r'^ckpt-(\d+)\.pt$')
+MODES = ('min', 'max')
+
+
+def checkpoint_name(step):
+    return f"ckpt-{int(step):08d}.pt"
+
+
+def rank_checkpoints(entries, mode):
+    """Entries that have a metric, best first."""
+    scored = [e for e in entries if e['metric'] is not None]
+    return sorted(scored, key=lambda e: e['metric'], reverse=mode == 'max')
+
+
+def select_checkpoints(entries, keep_last, keep_best, mode, keep=()):
+    """
+    Split checkpoints into the ones rotation keeps and the ones it deletes.
+
+    Args:
+        entries: Manifest entries ('file', 'step', 'metric', ...)
+        keep_last: Most recent checkpoints to keep
+        keep_best: Best checkpoints (by metric) to keep in addition
+        mode: 'min' or 'max', whether lower or higher metrics are better
+        keep: File names kept regardless (e.g. the one just written)
+
+    Returns:
+        tuple: (kept, removed), each sorted by step
+    """
+    entries = sorted(entries, key=lambda e: e['step'])
+    names = {e['file'] for e in entries[-keep_last:]} if keep_last else set()
+    names |= {e['file'] for e in rank_checkpoints(entries, mode)[:keep_best]}
+    names |= set(keep)
+    return [e for e in entries if e['file'] in names], [e for e in entries if e['file'] not in names]
+
+
+def manifest_bytes(entries, mode):
+    return json.dumps({'mode': mode, 'checkpoints': entries}, indent=2).encode()
+
+
+def read_manifest(directory, mode=None):
+    """
+    Checkpoints present in a directory, and the mode they are ranked by.
+
+    Entries whose file is gone are dropped; checkpoint files published after
+    the last manifest write (a crash in between) are added without a metric.
+
+    Args:
+        directory: Checkpoint directory
+        mode: Expected 'min'/'max', or None to use the stored one ('min' if none)
+
+    Returns:
+        tuple: (entries sorted by step, mode)
+
+    Raises:
+        ValueError: If mode conflicts with the mode stored in the manifest
+    """
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"mode must be 'min' or 'max', got {mode!r}")
+    try:
+        with open(os.path.join(directory, 'manifest.json'), 'r') as f:
+            manifest = json.load(f)
+        entries, stored = manifest['checkpoints'], manifest.get('mode')
+    except (OSError, ValueError, KeyError, TypeError):
+        entries, stored = [], None
+    if mode is not None and stored is not None and mode != stored:
+        raise ValueError(f"{directory} ranks checkpoints with mode={stored!r}, not {mode!r}; "
+                         f"reopen it with mode={stored!r} or use a new directory")
+
+    on_disk = {name for name in os.listdir(directory) if CHECKPOINT_PATTERN.match(name)}
+    entries = [e for e in entries if e['file'] in on_disk]
+    known = {e['file'] for e in entries}
+    for name in on_disk - known:
+        entries.append({'file': name, 'step': int(CHECKPOINT_PATTERN.match(name).group(1)),
+                        'metric': None, 'time': os.path.getmtime(os.path.join(directory, name))})
+    return sorted(entries, key=lambda e: e['step']), mode or stored or 'min'
+
+
+def main():
+    """Show which checkpoints rotation keeps for a run of validation accuracies."""
+    accuracies = [0.61, 0.72, 0.70, 0.75, 0.74, 0.73, 0.71]
+    entries = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for step, accuracy in enumerate(accuracies):
+            name = checkpoint_name(step)
+            open(os.path.join(tmp, name), 'wb').close()
+            entries.append({'file': name, 'step': step, 'metric': accuracy, 'time': 0.0})
+            entries, removed = select_checkpoints(entries, keep_last=2, keep_best=1, mode='max', keep={name})
+            for entry in removed:
+                os.remove(os.path.join(tmp, entry['file']))
+            with open(os.path.join(tmp, 'manifest.json'), 'wb') as f:
+                f.write(manifest_bytes(entries, 'max'))
+            print(f"step {step} (acc {accuracy:.2f}): keep {[e['step'] for e in entries]}")
+
+        restored, mode = read_manifest(tmp)
+        print(f"reopened: mode={mode}, best step {rank_checkpoints(restored, mode)[0]['step']}")
+        try:
+            read_manifest(tmp, mode='min')
+        except ValueError as e:
+            print(f"reopening with mode='min': {e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Training-loop engine for the deep-learning skill.
+train_epoch in the skill and train_model in the deep-learning agent move each
+batch with a synchronous .to(device) and call loss.item() every step. On a
+GPU every .item() forces a host/device sync, and on any device the loader
+and the model run one after the other. This engine:
+
+- accumulates the loss (and eval accuracy) in on-device tensors, syncing
+  only every log_interval steps and at the end of the epoch;
+- prefetches batches on a background thread. On CUDA it pins host memory
+  and copies with non_blocking=True on a side stream, so the copy overlaps
+  the previous step. On CPU the thread overlaps collation and transforms
+  (DataLoader num_workers=0, or the main-process part of a worker loader)
+  with compute;
+- reports samples/sec and the fraction of time spent waiting for data.
+"""
+
+import sys
+import time
+import queue
+import threading
+
+import torch
+import torch.nn as nn
+
+_DONE = object()
+
+
+def _move(obj, device, non_blocking):
+    if torch.is_tensor(obj):
+        if device.type == 'cuda' and not obj.is_pinned():
+            obj = obj.pin_memory()
+        return obj.to(device, non_blocking=non_blocking)
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_move(o, device, non_blocking) for o in obj)
+    if isinstance(obj, dict):
+        return {k: _move(v, device, non_blocking) for k, v in obj.items()}
+    return obj
+
+
+def _record_stream(obj, stream):
+    if torch.is_tensor(obj):
+        obj.record_stream(stream)
+    elif isinstance(obj, (list, tuple)):
+        for o in obj:
+            _record_stream(o, stream)
+    elif isinstance(obj, dict):
+        for o in obj.values():
+            _record_stream(o, stream)
+
+
+class Prefetcher:
+    """Iterate a loader on a background thread, `depth` batches ahead, already on device."""
+
+    def __init__(self, loader, device, depth=2):
+        self.loader = loader
+        self.device = torch.device(device)
+        self.depth = depth
+        self.wait_seconds = 0.0
+
+    def __len__(self):
+        return len(self.loader)
+
+    def __iter__(self):
+        cuda = self.device.type == 'cuda'
+        stream = torch.cuda.Stream(device=self.device) if cuda else None
+        batches = queue.Queue(maxsize=self.depth)
+        stop = threading.Event()
+
+        def produce():
+            try:
+                for batch in self.loader:
+                    if stop.is_set():
+                        return
+                    if cuda:
+                        with torch.cuda.stream(stream):
+                            batch = _move(batch, self.device, non_blocking=True)
+                            event = torch.cuda.Event()
+                            event.record(stream)
+                    else:
+                        batch, event = _move(batch, self.device, non_blocking=False), None
+                    batches.put((batch, event))
+                batches.put((_DONE, None))
+            except BaseException as e:  # surface loader errors in the consumer
+                batches.put((e, None))
+
+        thread = threading.Thread(target=produce, name='prefetch', daemon=True)
+        thread.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                batch, event = batches.get()
+                self.wait_seconds += time.perf_counter() - start
+                if batch is _DONE:
+                    return
+                if isinstance(batch, BaseException):
+                    raise batch
+                if event is not None:
+                    current = torch.cuda.current_stream(self.device)
+                    current.wait_event(event)
+                    # Keep the side-stream allocations alive until this step is done
+                    _record_stream(batch, current)
+                yield batch
+        finally:
+            stop.set()
+            # Unblock a producer waiting on a full queue
+            while thread.is_alive():
+                try:
+                    batches.get_nowait()
+                except queue.Empty:
+                    thread.join(timeout=0.05)
+
+
+class ThroughputMeter:
+    """Samples and steps over an epoch, with samples/sec."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.samples = 0
+        self.steps = 0
+
+    def update(self, batch_size):
+        self.samples += batch_size
+        self.steps += 1
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    @property
+    def samples_per_sec(self):
+        return self.samples / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def train_epoch(model, loader, optimizer, criterion, device, scaler=None, scheduler=None,
+                clip_grad_norm=None, log_interval=50, prefetch=2, log_fn=print):
+    """
+    One training epoch with prefetching and deferred loss syncs.
+
+    Args:
+        model: nn.Module (already on device)
+        loader: Iterable of (inputs, targets) batches
+        optimizer: Optimizer
+        criterion: Loss function
+        device: Training device
+        scaler: torch.cuda.amp.GradScaler for mixed precision (optional)
+        scheduler: Per-step LR scheduler (optional)
+        clip_grad_norm: Max gradient norm (optional)
+        log_interval: Steps between synced progress logs (0 disables)
+        prefetch: Batches prefetched ahead (0 = iterate loader directly)
+        log_fn: Callable receiving progress strings
+
+    Returns:
+        dict: 'loss' (per-sample mean), 'samples_per_sec', 'data_wait_frac', 'steps'
+    """
+    device = torch.device(device)
+    model.train()
+    batches = Prefetcher(loader, device, prefetch) if prefetch else loader
+    meter = ThroughputMeter()
+    loss_sum = torch.zeros((), device=device)
+    logged_sum, logged_samples = 0.0, 0
+
+    for batch_x, batch_y in batches:
+        if not prefetch:
+            batch_x, batch_y = batch_x.to(device), batch_y.to(device)
+        optimizer.zero_grad(set_to_none=True)
+
+        if scaler is not None:
+            with torch.autocast(device_type=device.type):
+                output = model(batch_x)
+                loss = criterion(output, batch_y)
+            scaler.scale(loss).backward()
+            if clip_grad_norm:
+                scaler.unscale_(optimizer)
+                nn.utils.clip_grad_norm_(model.parameters(), clip_grad_norm)
+            scaler.step(optimizer)
+            scaler.update()
+        else:
+            output = model(batch_x)
+            loss = criterion(output, batch_y)
+            loss.backward()
+            if clip_grad_norm:
+                nn.utils.clip_grad_norm_(model.parameters(), clip_grad_norm)
+            optimizer.step()
+        if scheduler is not None:
+            scheduler.step()
+
+        n = batch_x.shape[0]
+        loss_sum += loss.detach() * n  # stays on device: no sync
+        meter.update(n)
+
+        if log_interval and meter.steps % log_interval == 0:
+            total = loss_sum.item()  # the only per-interval sync
+            log_fn(f"step {meter.steps}: loss {(total - logged_sum) / (meter.samples - logged_samples):.4f}, "
+                   f"{meter.samples_per_sec:.0f} samples/s")
+            logged_sum, logged_samples = total, meter.samples
+
+    wait = batches.wait_seconds if prefetch else 0.0
+    return {
+        'loss': loss_sum.item() / max(meter.samples, 1),
+        'samples_per_sec': meter.samples_per_sec,
+        'data_wait_frac': wait / meter.elapsed if meter.elapsed > 0 else 0.0,
+        'steps': meter.steps,
+    }
+
+
+@torch.no_grad()
+def evaluate(model, loader, criterion, device, prefetch=2):
+    """Validation loss and accuracy with a single sync at the end."""
+    device = torch.device(device)
+    model.eval()
+    batches = Prefetcher(loader, device, prefetch) if prefetch else loader
+    loss_sum = torch.zeros((), device=device)
+    correct = torch.zeros((), dtype=torch.long, device=device)
+    samples = 0
+    for data, target in batches:
+        if not prefetch:
+            data, target = data.to(device), target.to(device)
+        output = model(data)
+        loss_sum += criterion(output, target) * data.shape[0]
+        correct += (output.argmax(dim=1) == target).sum()
+        samples += data.shape[0]
+    samples = max(samples, 1)
+    return {'val_loss': loss_sum.item() / samples, 'val_acc': correct.item() / samples}
+
+
+def _naive_epoch(model, loader, optimizer, criterion, device):
+    """The skill's train_epoch: sync .to() and loss.item() every step."""
+    model.train()
+    total_loss = 0
+    start = time.perf_counter()
+    samples = 0
+    for batch_x, batch_y in loader:
+        batch_x, batch_y = batch_x.to(device), batch_y.to(device)
+        optimizer.zero_grad()
+        loss = criterion(model(batch_x), batch_y)
+        loss.backward()
+        optimizer.step()
+        total_loss += loss.item()
+        samples += batch_x.shape[0]
+    return samples / (time.perf_counter() - start)
+
+
+class _AugmentedDataset(torch.utils.data.Dataset):
+    """Synthetic images with a per-sample CPU transform, like a light augmentation."""
+
+    def __init__(self, n=8_192, shape=(3, 32, 32), num_classes=10):
+        generator = torch.Generator().manual_seed(0)
+        self.images = torch.randn(n, *shape, generator=generator)
+        self.labels = torch.randint(0, num_classes, (n,), generator=generator)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        image = self.images[i]
+        if i % 2:
+            image = image.flip(-1)
+        return (image - image.mean()) / (image.std() + 1e-6), self.labels[i]
+
+
+def main():
+    """Compare the naive loop with the prefetching engine on this machine."""
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    torch.manual_seed(0)
+    loader = torch.utils.data.DataLoader(_AugmentedDataset(), batch_size=128, shuffle=True)
+
+    def fresh_model():
+        torch.manual_seed(0)
+        model = nn.Sequential(
+            nn.Conv2d(3, 32, 3, padding=1), nn.ReLU(), nn.MaxPool2d(2),
+            nn.Conv2d(32, 64, 3, padding=1), nn.ReLU(), nn.AdaptiveAvgPool2d(1),
+            nn.Flatten(), nn.Linear(64, 10),
+        ).to(device)
+        return model, torch.optim.SGD(model.parameters(), lr=0.05, momentum=0.9)
+
+    criterion = nn.CrossEntropyLoss()
+    model, optimizer = fresh_model()
+    _naive_epoch(model, loader, optimizer, criterion, device)  # warm-up
+    naive = _naive_epoch(model, loader, optimizer, criterion, device)
+
+    model, optimizer = fresh_model()
+    train_epoch(model, loader, optimizer, criterion, device, log_interval=0)  # warm-up
+    stats = train_epoch(model, loader, optimizer, criterion, device, log_interval=20)
+    print(f"{device.type}: naive {naive:.0f} samples/s, engine {stats['samples_per_sec']:.0f} samples/s "
+          f"({stats['samples_per_sec'] / naive:.2f}x), data wait {stats['data_wait_frac']:.0%}")
+    print(evaluate(model, loader, criterion, device))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Production A/B testing for model versions.
+ABTestingManager assigns variants by hashing (experiment, salt, user_id)
+with BLAKE2b into a 64-bit bucket, so assignment is stateless, thread-safe
+and identical in every worker process regardless of PYTHONHASHSEED. Outcome
+counters are sharded per thread (each thread only ever writes its own
+shard), so recording never takes a lock; reads sum the shards.
+"""
+
+import sys
+import bisect
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+
+from experiment_stats import SequentialTest
+
+BUCKETS = 1 << 64
+
+
+def bucket(experiment_name: str, user_id, salt: str = '') -> int:
+    """
+    Stable 64-bit bucket for a user in an experiment.
+
+    Args:
+        experiment_name: Experiment name
+        user_id: Any value with a stable str()
+        salt: Per-experiment salt (re-randomises assignment when changed)
+
+    Returns:
+        int: Bucket in [0, 2**64)
+    """
+    key = f"{experiment_name}\0{salt}\0{user_id}".encode('utf-8')
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+@dataclass
+class Experiment:
+    name: str
+    variants: Dict[str, float]  # variant_name -> weight
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    salt: str = ''
+    names: tuple = field(init=False, repr=False)
+    thresholds: list = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # Upper bucket bound per variant; the last one always reaches 2**64
+        self.names = tuple(self.variants)
+        cumulative = 0.0
+        self.thresholds = []
+        for weight in self.variants.values():
+            cumulative += weight
+            self.thresholds.append(min(BUCKETS, int(cumulative * BUCKETS)))
+        self.thresholds[-1] = BUCKETS
+
+    def assign_index(self, user_id) -> int:
+        index = bisect.bisect_right(self.thresholds, bucket(self.name, user_id, self.salt))
+        return min(index, len(self.names) - 1)
+
+    def assign(self, user_id) -> str:
+        return self.names[self.assign_index(user_id)]
+
+
+class OutcomeCounters:
+    """Per-variant (count, success) counters, sharded per thread."""
+
+    def __init__(self, n_variants: int):
+        self.n_variants = n_variants
+        self._local = threading.local()
+        self._shards = []
+        self._register = threading.Lock()
+
+    def _shard(self) -> list:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = [0] * (2 * self.n_variants)
+            with self._register:  # once per thread, never on the hot path
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def record(self, variant_index: int, success: bool):
+        shard = self._shard()
+        shard[2 * variant_index] += 1
+        if success:
+            shard[2 * variant_index + 1] += 1
+
+    def add(self, variant_index: int, count: int, success: int):
+        """Fold in externally aggregated counts (e.g. from another process)."""
+        shard = self._shard()
+        shard[2 * variant_index] += count
+        shard[2 * variant_index + 1] += success
+
+    def totals(self) -> list:
+        """[(count, success)] per variant."""
+        sums = [0] * (2 * self.n_variants)
+        for shard in list(self._shards):
+            for i, value in enumerate(shard):
+                sums[i] += value
+        return [(sums[2 * i], sums[2 * i + 1]) for i in range(self.n_variants)]
+
+
+class ABTestingManager:
+    """Manage A/B testing for model versions."""
+
+    def __init__(self):
+        self.experiments = {}
+        self.counters = {}
+        self.tests = {}
+
+    def create_experiment(self, name, variants, salt='', control=None):
+        """Create new A/B test experiment."""
+        # Validate weights sum to 1
+        if abs(sum(variants.values()) - 1.0) > 0.01:
+            raise ValueError("Variant weights must sum to 1")
+        if control is not None and control not in variants:
+            raise ValueError(f"Control {control!r} is not one of the variants {list(variants)}")
+
+        self.experiments[name] = Experiment(
+            name=name,
+            variants=dict(variants),
+            start_time=datetime.now(),
+            salt=salt,
+        )
+        self.counters[name] = OutcomeCounters(len(variants))
+        self.tests[name] = SequentialTest(variants, control=control)
+
+    def get_variant(self, experiment_name, user_id):
+        """Get variant assignment for user (stateless, same in every process)."""
+        experiment = self.experiments.get(experiment_name)
+        if not experiment:
+            return None
+        return experiment.assign(user_id)
+
+    def record_outcome(self, experiment_name, user_id, success):
+        """Record outcome for the user's variant."""
+        experiment = self.experiments.get(experiment_name)
+        if not experiment:
+            return
+        self.counters[experiment_name].record(experiment.assign_index(user_id), success)
+
+    def snapshot(self, experiment_name) -> Dict[str, dict]:
+        """Counts per variant, e.g. to ship from a worker process."""
+        experiment = self.experiments[experiment_name]
+        return {
+            variant: {'count': count, 'success': success}
+            for variant, (count, success) in zip(experiment.names, self.counters[experiment_name].totals())
+        }
+
+    def merge_snapshot(self, experiment_name, snapshot):
+        """Add a snapshot produced by another process."""
+        experiment = self.experiments[experiment_name]
+        counters = self.counters[experiment_name]
+        for variant, data in snapshot.items():
+            counters.add(experiment.names.index(variant), data['count'], data['success'])
+
+    def get_statistics(self, experiment_name):
+        """
+        Get experiment statistics.
+
+        Per-variant counts and rates, plus always-valid mSPRT p-values and
+        P(beats control) for every non-control variant (see
+        experiment_stats.SequentialTest). With two variants the treatment's
+        'p_value' and 'significant' are also repeated at the top level.
+        """
+        if experiment_name not in self.experiments:
+            return None
+
+        test = self.tests[experiment_name]
+        test.set_counts(self.snapshot(experiment_name))
+        results = test.summary()
+
+        if len(results) == 2:
+            treatment = next(name for name in results if name != test.control)
+            results['p_value'] = results[treatment]['p_value']
+            results['significant'] = results[treatment]['significant']
+
+        return results
+
+
+def main():
+    """Show assignment balance and thread-safe recording."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    manager = ABTestingManager()
+    manager.create_experiment('model_v2', {'control': 0.5, 'treatment': 0.5})
+
+    def simulate(worker):
+        for user in range(worker * 25_000, (worker + 1) * 25_000):
+            manager.record_outcome('model_v2', f"user-{user}", success=user % 7 == 0)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(simulate, range(8)))
+
+    for variant, data in manager.snapshot('model_v2').items():
+        print(f"{variant}: {data['count']} users, {data['success']} successes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
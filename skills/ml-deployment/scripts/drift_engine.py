@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Distribution drift engine for the ml-deployment skill.
+Scores every feature with PSI, Kolmogorov-Smirnov and Jensen-Shannon against
+a reference sample, in bounded memory: live windows are summarised by binned
+histograms (on the reference deciles) and mergeable quantile sketches, never
+by the raw rows. Supports tumbling and sliding (pane-based) windows and is
+vectorised across features, so thousands of features cost one NumPy pass per
+batch.
+"""
+
+import sys
+
+import numpy as np
+
+EPS = 1e-6
+# Cap on booleans materialised at once when binning a batch
+BINNING_CHUNK_ELEMENTS = 8_000_000
+
+
+class QuantileSketch:
+    """
+    Compactor quantile sketch (KLL/MRL family) for many features at once.
+
+    Every feature receives the same number of values, so all features share
+    one level layout: level l holds up to `capacity` items per feature, each
+    standing for 2**l observations. A full level is sorted and every other
+    item (random offset) is promoted, which keeps memory at
+    O(features * capacity * log(n / capacity)) with rank error O(1/capacity).
+    """
+
+    def __init__(self, n_features, capacity=200, seed=None):
+        self.n_features = n_features
+        self.capacity = capacity
+        self.levels = []
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, batch):
+        """Add rows of shape (n, n_features)."""
+        batch = np.asarray(batch, dtype=np.float64).reshape(-1, self.n_features)
+        if len(batch):
+            self.count += len(batch)
+            self._push(0, batch.T)
+
+    def merge(self, other):
+        """Fold another sketch with the same layout into this one."""
+        self.count += other.count
+        for level, items in enumerate(other.levels):
+            if items.shape[1]:
+                self._push(level, items)
+        return self
+
+    def _push(self, level, items):
+        while True:
+            while level >= len(self.levels):
+                self.levels.append(np.empty((self.n_features, 0)))
+            merged = np.concatenate([self.levels[level], items], axis=1)
+            if merged.shape[1] < self.capacity:
+                self.levels[level] = merged
+                return
+            merged.sort(axis=1)
+            size = merged.shape[1] - merged.shape[1] % 2
+            offset = int(self._rng.integers(2))
+            items = merged[:, offset:size:2]
+            self.levels[level] = merged[:, size:]
+            level += 1
+
+    def weighted_items(self):
+        """Return (items (F, M), weights (M,)) across all levels."""
+        if not self.levels:
+            return np.empty((self.n_features, 0)), np.empty(0)
+        items = np.concatenate(self.levels, axis=1)
+        weights = np.concatenate([np.full(l.shape[1], 2.0 ** i) for i, l in enumerate(self.levels)])
+        return items, weights
+
+    def cdf(self, points):
+        """Estimated P(X <= point) per feature for points of shape (F, G)."""
+        items, weights = self.weighted_items()
+        return weighted_cdf(items, weights, points)
+
+    def quantiles(self, qs):
+        """Estimated quantiles per feature, shape (F, len(qs))."""
+        items, weights = self.weighted_items()
+        order = np.argsort(items, axis=1)
+        items = np.take_along_axis(items, order, axis=1)
+        cum = np.cumsum(weights[order], axis=1)
+        total = cum[:, -1:]
+        targets = np.asarray(qs)[None, :] * total
+        # Row-wise searchsorted: offset each row into its own disjoint range
+        span = total + 1.0
+        rows = np.arange(self.n_features)[:, None]
+        flat = (cum + rows * span).ravel()
+        idx = np.searchsorted(flat, (targets + rows * span).ravel()).reshape(targets.shape)
+        idx = np.clip(idx - rows * cum.shape[1], 0, cum.shape[1] - 1)
+        return np.take_along_axis(items, idx, axis=1)
+
+    @property
+    def nbytes(self):
+        return sum(l.nbytes for l in self.levels)
+
+
+def weighted_cdf(items, weights, points):
+    """
+    Row-wise weighted empirical CDF.
+
+    Args:
+        items: Sample values, shape (F, M)
+        weights: Weights, shape (M,) or (F, M)
+        points: Evaluation points, shape (F, G)
+
+    Returns:
+        np.ndarray: P(X <= point), shape (F, G)
+    """
+    n_features, m = items.shape
+    if m == 0:
+        return np.zeros(points.shape)
+    weights = np.broadcast_to(weights, items.shape)
+    values = np.concatenate([items, points], axis=1)
+    mass = np.concatenate([weights, np.zeros(points.shape)], axis=1)
+    # Stable sort keeps items ahead of equal-valued points, giving "<="
+    order = np.argsort(values, axis=1, kind='stable')
+    cum = np.cumsum(np.take_along_axis(mass, order, axis=1), axis=1)
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(values.shape[1])[None, :].repeat(n_features, 0), axis=1)
+    return np.take_along_axis(cum, rank[:, m:], axis=1) / cum[:, -1:]
+
+
+def grid_cdf(grid, points):
+    """
+    Row-wise CDF of a sorted quantile grid, linear between grid points.
+
+    Treating the grid as a step function would overstate KS by up to
+    1 / grid_size; interpolating matches the CDF of continuous features.
+    At a value repeated in the grid (a point mass of a discrete feature) the
+    true CDF lies between the last tied level and the next, so the midpoint
+    is used.
+
+    Args:
+        grid: Quantiles at np.linspace(0, 1, G), shape (F, G)
+        points: Evaluation points, shape (F, P)
+
+    Returns:
+        np.ndarray: P(X <= point), shape (F, P)
+    """
+    size = grid.shape[1]
+    # Number of grid values <= each point
+    k = np.rint(weighted_cdf(grid, np.ones(size), points) * size).astype(np.int64)
+    lower = np.take_along_axis(grid, np.clip(k - 1, 0, size - 1), axis=1)
+    upper = np.take_along_axis(grid, np.clip(k, 0, size - 1), axis=1)
+    gap = upper - lower
+    frac = np.divide(points - lower, gap, out=np.zeros(points.shape), where=gap > 0)
+    before = np.take_along_axis(grid, np.clip(k - 2, 0, size - 1), axis=1)
+    tied = (k >= 2) & (before == lower) & (points == lower)
+    rank = np.where(tied, k - 0.5, k - 1 + frac)
+    return np.where(k == 0, 0.0, np.clip(rank / (size - 1), 0.0, 1.0))
+
+
+def bin_counts(batch, edges):
+    """
+    Histogram every feature of a batch on its own bin edges.
+
+    Args:
+        batch: Rows of shape (n, F)
+        edges: Interior bin edges, shape (F, B - 1)
+
+    Returns:
+        np.ndarray: Counts of shape (F, B)
+    """
+    n_features, n_inner = edges.shape
+    n_bins = n_inner + 1
+    counts = np.zeros(n_features * n_bins, dtype=np.int64)
+    offsets = np.arange(n_features)[None, :] * n_bins
+    step = max(1, BINNING_CHUNK_ELEMENTS // max(1, n_features * n_inner))
+
+    for start in range(0, len(batch), step):
+        chunk = batch[start:start + step]
+        bins = (chunk[:, :, None] > edges[None, :, :]).sum(axis=2)
+        counts += np.bincount((bins + offsets).ravel(), minlength=counts.size)
+    return counts.reshape(n_features, n_bins)
+
+
+def psi(ref_prop, live_prop):
+    """Population Stability Index per feature."""
+    p = np.clip(ref_prop, EPS, None)
+    q = np.clip(live_prop, EPS, None)
+    return ((q - p) * np.log(q / p)).sum(axis=1)
+
+
+def js_divergence(ref_prop, live_prop):
+    """Jensen-Shannon divergence (base 2, in [0, 1]) per feature."""
+    p = np.clip(ref_prop, EPS, None)
+    q = np.clip(live_prop, EPS, None)
+    m = (p + q) / 2
+    return 0.5 * (p * np.log2(p / m)).sum(axis=1) + 0.5 * (q * np.log2(q / m)).sum(axis=1)
+
+
+class _Pane:
+    """Histogram counts plus sketch for a run of consecutive observations."""
+
+    def __init__(self, n_features, n_bins, capacity, seed):
+        self.counts = np.zeros((n_features, n_bins), dtype=np.int64)
+        self.sketch = QuantileSketch(n_features, capacity, seed)
+        self.n = 0
+
+
+class DriftEngine:
+    """PSI / KS / JS drift scoring over tumbling or sliding windows."""
+
+    def __init__(self, reference_data, window_size=10_000, mode='tumbling', n_panes=10,
+                 n_bins=10, grid_size=100, sketch_capacity=200, feature_names=None, seed=0):
+        """
+        Args:
+            reference_data: Reference sample (n_samples, n_features)
+            window_size: Observations per window
+            mode: 'tumbling' (disjoint windows) or 'sliding' (window advances
+                one pane at a time)
+            n_panes: Panes per sliding window (ignored when tumbling)
+            n_bins: Histogram bins, on reference quantiles (10 = deciles)
+            grid_size: Reference quantiles kept for the KS statistic
+            sketch_capacity: Items per sketch level (accuracy vs memory)
+            feature_names: Optional names used in reports
+            seed: Seed for sketch compaction (scores are reproducible for a seed)
+        """
+        if mode not in ('tumbling', 'sliding'):
+            raise ValueError(f"Unknown window mode: {mode}")
+
+        reference = np.asarray(reference_data, dtype=np.float64)
+        self.n_features = reference.shape[1]
+        self.mode = mode
+        self.n_panes = n_panes if mode == 'sliding' else 1
+        self.pane_size = max(1, window_size // self.n_panes)
+        self.window_size = self.pane_size * self.n_panes
+        self.n_bins = n_bins
+        self.sketch_capacity = sketch_capacity
+        self.feature_names = list(feature_names) if feature_names is not None \
+            else [f"feature_{i}" for i in range(self.n_features)]
+        self._seed = np.random.SeedSequence(seed)
+        # Fixed seed for the per-report merge, so scoring does not consume pane seeds
+        self._merge_seed = self._seed.spawn(1)[0]
+
+        # Reference summary: bin edges, bin proportions and a quantile grid
+        inner = np.linspace(0, 1, n_bins + 1)[1:-1]
+        self.edges = np.quantile(reference, inner, axis=0).T
+        ref_counts = bin_counts(reference, self.edges)
+        self.reference_prop = ref_counts / ref_counts.sum(axis=1, keepdims=True)
+        self.reference_grid = np.quantile(reference, np.linspace(0, 1, grid_size), axis=0).T
+
+        self.panes = []
+        self.observations = 0
+        self._new_pane()
+
+    def _new_pane(self):
+        seed = self._seed.spawn(1)[0]
+        self.panes.append(_Pane(self.n_features, self.n_bins, self.sketch_capacity, seed))
+        if len(self.panes) > self.n_panes:
+            self.panes.pop(0)
+
+    def update(self, batch):
+        """
+        Ingest a batch of rows.
+
+        Args:
+            batch: Rows of shape (n, n_features)
+
+        Returns:
+            list: Reports for every window completed by this batch
+        """
+        batch = np.asarray(batch, dtype=np.float64).reshape(-1, self.n_features)
+        reports = []
+        start = 0
+        while start < len(batch):
+            pane = self.panes[-1]
+            take = min(self.pane_size - pane.n, len(batch) - start)
+            rows = batch[start:start + take]
+            pane.counts += bin_counts(rows, self.edges)
+            pane.sketch.update(rows)
+            pane.n += take
+            self.observations += take
+            start += take
+
+            if pane.n == self.pane_size:
+                if sum(p.n for p in self.panes) == self.window_size:
+                    reports.append(self._score(self.panes))
+                self._new_pane()
+        return reports
+
+    def scores(self):
+        """Scores for the current (possibly partial) window, or None if empty."""
+        panes = [p for p in self.panes if p.n]
+        return self._score(panes) if panes else None
+
+    def _score(self, panes):
+        counts = sum(p.counts for p in panes)
+        n = int(counts[0].sum())
+        live_prop = counts / max(n, 1)
+
+        sketch = QuantileSketch(self.n_features, self.sketch_capacity, self._merge_seed)
+        for pane in panes:
+            sketch.merge(pane.sketch)
+        items, weights = sketch.weighted_items()
+
+        # KS: sup |F_ref - F_live| over both reference grid and live sketch points.
+        # Sketch rank error still biases it up slightly (~0.003 at the defaults)
+        grid = self.reference_grid
+        points = np.concatenate([grid, items], axis=1)
+        ks = np.abs(grid_cdf(grid, points) - weighted_cdf(items, weights, points)).max(axis=1)
+
+        return {
+            'end': self.observations,
+            'n': n,
+            'psi': psi(self.reference_prop, live_prop),
+            'ks': ks,
+            'js': js_divergence(self.reference_prop, live_prop),
+        }
+
+    def drifted_features(self, report, psi_threshold=0.2, ks_threshold=0.1):
+        """
+        Names of features over either threshold in a report.
+
+        The sketched KS runs about 0.003-0.005 above scipy's ks_2samp at the
+        default grid_size and sketch_capacity, so allow that margin (or raise
+        sketch_capacity) when ks_threshold sits close to expected values.
+        """
+        mask = (report['psi'] > psi_threshold) | (report['ks'] > ks_threshold)
+        return [self.feature_names[i] for i in np.flatnonzero(mask)]
+
+    @property
+    def nbytes(self):
+        """Memory held by live-window state."""
+        return sum(p.counts.nbytes + p.sketch.nbytes for p in self.panes)
+
+
+def main():
+    """Score a simulated shift on a few hundred features."""
+    rng = np.random.default_rng(0)
+    n_features = 500
+    engine = DriftEngine(rng.normal(size=(20_000, n_features)), window_size=5_000, mode='sliding', n_panes=5)
+
+    for step in range(20):
+        batch = rng.normal(size=(1_000, n_features))
+        if step >= 10:
+            batch[:, :10] = rng.exponential(size=(1_000, 10))  # shape change, not just mean
+        for report in engine.update(batch):
+            drifted = engine.drifted_features(report)
+            print(f"obs={report['end']:>6}: {len(drifted)} drifted features, "
+                  f"max PSI={report['psi'].max():.3f}, max KS={report['ks'].max():.3f}")
+
+    print(f"Live state: {engine.nbytes / 1e6:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
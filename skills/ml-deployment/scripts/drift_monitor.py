@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Streaming input-drift monitor for the ml-deployment skill.
+DriftDetector keeps the sliding window in a preallocated NumPy ring buffer
+and maintains the window mean and variance incrementally (Welford updates for
+single observations, Chan's merge/split formulas for batches), so ingesting
+an observation and querying drift are both O(features).
+"""
+
+import sys
+
+import numpy as np
+
+# Recompute window moments from the buffer after this many window turnovers
+# to bound floating-point drift in the running sums.
+REFRESH_EVERY_WINDOWS = 1
+
+
+class DriftDetector:
+    """Detect data drift against a reference sample over a sliding window."""
+
+    def __init__(self, reference_data, window_size=1000, min_observations=100):
+        """
+        Args:
+            reference_data: Reference sample (n_samples, n_features)
+            window_size: Number of recent observations kept
+            min_observations: Observations needed before drift is reported
+        """
+        reference = np.asarray(reference_data, dtype=np.float64)
+        if reference.ndim == 1:
+            reference = reference[:, None]
+
+        self.reference_mean = reference.mean(axis=0)
+        self.reference_std = reference.std(axis=0)
+        self.window_size = window_size
+        self.min_observations = min_observations
+        self.n_features = reference.shape[1]
+
+        self._buffer = np.empty((window_size, self.n_features), dtype=np.float64)
+        self._pos = 0          # next slot to write
+        self._count = 0        # valid rows in the buffer
+        self._mean = np.zeros(self.n_features)
+        self._m2 = np.zeros(self.n_features)
+        self._since_refresh = 0
+
+    def __len__(self):
+        return self._count
+
+    def add_observation(self, features):
+        """Add new observation to drift window."""
+        x = np.asarray(features, dtype=np.float64).reshape(self.n_features)
+
+        if self._count < self.window_size:
+            self._count += 1
+            delta = x - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (x - self._mean)
+        else:
+            # Replace the oldest row: one combined remove/add update
+            old = self._buffer[self._pos]
+            old_mean = self._mean.copy()
+            self._mean += (x - old) / self._count
+            self._m2 += (x - old) * (x - self._mean + old - old_mean)
+
+        self._buffer[self._pos] = x
+        self._pos = (self._pos + 1) % self.window_size
+        self._tick(1)
+
+    def add_batch(self, batch):
+        """
+        Add a whole prediction batch to the drift window.
+
+        Args:
+            batch: Array of shape (n_rows, n_features)
+        """
+        batch = np.asarray(batch, dtype=np.float64).reshape(-1, self.n_features)
+        if len(batch) == 0:
+            return
+        if len(batch) >= self.window_size:
+            self._buffer[:] = batch[-self.window_size:]
+            self._pos = 0
+            self._count = self.window_size
+            self._refresh()
+            return
+
+        n_new = len(batch)
+        slots = (self._pos + np.arange(n_new)) % self.window_size
+        n_evicted = max(0, self._count + n_new - self.window_size)
+
+        if n_evicted:
+            oldest = (self._pos - self._count) % self.window_size
+            self._split(self._buffer[(oldest + np.arange(n_evicted)) % self.window_size])
+
+        self._merge(batch)
+        self._buffer[slots] = batch
+        self._pos = (self._pos + n_new) % self.window_size
+        self._tick(n_new)
+
+    def _merge(self, block):
+        """Chan et al. parallel update: fold a block into the window moments."""
+        n_a, n_b = self._count, len(block)
+        mean_b = block.mean(axis=0)
+        m2_b = ((block - mean_b) ** 2).sum(axis=0)
+        n = n_a + n_b
+        delta = mean_b - self._mean
+        self._mean = self._mean + delta * (n_b / n)
+        self._m2 = self._m2 + m2_b + delta ** 2 * (n_a * n_b / n)
+        self._count = n
+
+    def _split(self, block):
+        """Inverse of _merge: remove a block of rows from the window moments."""
+        n, n_b = self._count, len(block)
+        mean_b = block.mean(axis=0)
+        m2_b = ((block - mean_b) ** 2).sum(axis=0)
+        n_a = n - n_b
+        mean_a = (self._mean * n - mean_b * n_b) / n_a
+        delta = mean_b - mean_a
+        self._m2 = np.maximum(self._m2 - m2_b - delta ** 2 * (n_a * n_b / n), 0.0)
+        self._mean = mean_a
+        self._count = n_a
+
+    def _tick(self, n):
+        self._since_refresh += n
+        if self._since_refresh >= REFRESH_EVERY_WINDOWS * self.window_size:
+            self._refresh()
+
+    def _refresh(self):
+        """Recompute window moments exactly from the buffer."""
+        window = self._buffer[:self._count] if self._count < self.window_size else self._buffer
+        self._mean = window.mean(axis=0)
+        self._m2 = ((window - self._mean) ** 2).sum(axis=0)
+        self._since_refresh = 0
+
+    @property
+    def recent_mean(self):
+        return self._mean.copy()
+
+    @property
+    def recent_std(self):
+        """Population std of the window (matches np.std)."""
+        if self._count == 0:
+            return np.zeros(self.n_features)
+        return np.sqrt(np.maximum(self._m2, 0.0) / self._count)
+
+    def feature_drift(self):
+        """Per-feature drift: |window mean - reference mean| / reference std."""
+        if self._count < self.min_observations:
+            return None
+        return np.abs(self._mean - self.reference_mean) / (self.reference_std + 1e-8)
+
+    def calculate_drift(self):
+        """Calculate drift score (mean of the per-feature scores)."""
+        scores = self.feature_drift()
+        return None if scores is None else float(scores.mean())
+
+
+def main():
+    """Simulate a mean shift and report when drift crosses a threshold."""
+    rng = np.random.default_rng(0)
+    detector = DriftDetector(rng.normal(size=(10_000, 20)))
+
+    for step in range(50):
+        shift = 0.0 if step < 25 else 0.5
+        detector.add_batch(rng.normal(loc=shift, size=(200, 20)))
+        drift = detector.calculate_drift()
+        if drift is not None and drift > 0.25:
+            print(f"Drift detected at batch {step}: {drift:.3f}")
+            return 0
+
+    print("No drift detected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Sequential-testing statistics for A/B experiments.
+Keeps (count, success) sufficient statistics per variant and answers, for any
+number of variants, two always-valid questions in closed form:
+
+- mSPRT (mixture sequential probability ratio test, Johari et al.) on the
+  difference in conversion rate vs control, giving an always-valid p-value
+  that may be checked after every observation without inflating the
+  false-positive rate.
+- Beta-binomial posterior probability that a variant beats control (normal
+  approximation to the Beta posteriors).
+
+Everything is a handful of float operations per variant, so dashboards can
+poll at high frequency; no SciPy import or contingency table per call.
+"""
+
+import sys
+import math
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+
+def normal_cdf(z: float) -> float:
+    return 0.5 * math.erfc(-z / math.sqrt(2.0))
+
+
+@dataclass
+class VariantStats:
+    count: int = 0
+    success: int = 0
+
+    @property
+    def rate(self) -> float:
+        return self.success / self.count if self.count > 0 else 0.0
+
+
+def msprt_lambda(theta_hat: float, var_hat: float, tau: float) -> float:
+    """
+    Gaussian-mixture likelihood ratio for H0: theta = 0.
+
+    Args:
+        theta_hat: Estimated difference in rates
+        var_hat: Estimated variance of theta_hat
+        tau: Std of the N(0, tau^2) mixing prior on the difference
+
+    Returns:
+        float: Mixture likelihood ratio Lambda
+    """
+    if var_hat <= 0:
+        return 1.0
+    tau2 = tau * tau
+    log_lambda = 0.5 * math.log(var_hat / (var_hat + tau2)) + \
+        theta_hat * theta_hat * tau2 / (2.0 * var_hat * (var_hat + tau2))
+    return math.exp(min(log_lambda, 700.0))
+
+
+class SequentialTest:
+    """Incremental N-variant experiment statistics with always-valid inference."""
+
+    def __init__(self, variants: Iterable[str], control: Optional[str] = None,
+                 alpha: float = 0.05, tau: float = 0.05, prior=(1.0, 1.0)):
+        """
+        Args:
+            variants: Variant names
+            control: Baseline variant (default: the first one)
+            alpha: Family-wise error rate; split across comparisons (Bonferroni)
+            tau: Mixing std on the rate difference (roughly the effect size
+                you expect; 0.05 = five percentage points)
+            prior: Beta(a, b) prior on every variant's rate
+        """
+        self.variants = {name: VariantStats() for name in variants}
+        if len(self.variants) < 2:
+            raise ValueError("Need at least two variants")
+        self.control = control or next(iter(self.variants))
+        self.alpha = alpha
+        self.tau = tau
+        self.prior = prior
+        self._p_values = {name: 1.0 for name in self.variants if name != self.control}
+        self._lock = threading.Lock()
+
+    def update(self, variant: str, count: int = 1, success: int = 0):
+        """Add observations to a variant."""
+        with self._lock:
+            stats = self.variants[variant]
+            stats.count += count
+            stats.success += success
+
+    def set_counts(self, counts: Dict[str, dict]):
+        """Replace counts from a snapshot ({variant: {'count', 'success'}})."""
+        with self._lock:
+            for variant, data in counts.items():
+                self.variants[variant] = VariantStats(data['count'], data['success'])
+
+    def _difference(self, variant: str):
+        a, b = self.variants[self.control], self.variants[variant]
+        if a.count == 0 or b.count == 0:
+            return None
+        pa, pb = a.rate, b.rate
+        var_hat = pa * (1 - pa) / a.count + pb * (1 - pb) / b.count
+        return pb - pa, var_hat
+
+    def always_valid_p(self, variant: str) -> float:
+        """
+        Always-valid p-value for variant vs control.
+
+        The running minimum of 1/Lambda over every poll, so it only ever
+        decreases and stays valid under continuous monitoring.
+        """
+        diff = self._difference(variant)
+        if diff is not None:
+            p = min(1.0, 1.0 / msprt_lambda(diff[0], diff[1], self.tau))
+            with self._lock:
+                self._p_values[variant] = min(self._p_values[variant], p)
+        return self._p_values[variant]
+
+    def prob_beats_control(self, variant: str) -> float:
+        """Posterior P(rate_variant > rate_control) under Beta priors."""
+        a0, b0 = self.prior
+        moments = []
+        for name in (self.control, variant):
+            stats = self.variants[name]
+            alpha = a0 + stats.success
+            beta = b0 + stats.count - stats.success
+            total = alpha + beta
+            moments.append((alpha / total, alpha * beta / (total * total * (total + 1))))
+        (mean_c, var_c), (mean_v, var_v) = moments
+        return normal_cdf((mean_v - mean_c) / math.sqrt(var_c + var_v))
+
+    def summary(self) -> dict:
+        """
+        Per-variant results in the ABTestingManager.get_statistics shape.
+
+        Returns:
+            dict: {variant: {'count', 'success', 'rate', ...}}; treatment
+                variants also carry 'p_value' (always valid), 'significant'
+                and 'prob_beats_control'
+        """
+        threshold = self.alpha / len(self._p_values)
+        results = {}
+        for name, stats in self.variants.items():
+            entry = {'count': stats.count, 'success': stats.success, 'rate': stats.rate}
+            if name != self.control:
+                p_value = self.always_valid_p(name)
+                entry.update(
+                    p_value=p_value,
+                    significant=p_value < threshold,
+                    prob_beats_control=self.prob_beats_control(name),
+                )
+            results[name] = entry
+        return results
+
+
+def main():
+    """Poll an A/A/B simulation and report when each arm becomes significant."""
+    import random
+    import time
+
+    rng = random.Random(0)
+    test = SequentialTest(['control', 'same', 'better'])
+    rates = {'control': 0.10, 'same': 0.10, 'better': 0.12}
+    decided = set()
+
+    for step in range(1, 200_001):
+        variant = rng.choice(list(rates))
+        test.update(variant, 1, int(rng.random() < rates[variant]))
+        if step % 1000 == 0:
+            for name, entry in test.summary().items():
+                if entry.get('significant') and name not in decided:
+                    decided.add(name)
+                    print(f"{name}: significant after {step} observations (p={entry['p_value']:.4f})")
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        test.summary()
+    print(f"summary(): {(time.perf_counter() - start) / 10_000 * 1e6:.1f} µs per poll")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Inference benchmarking for the ml-deployment skill.
+Replaces ONNXInference.benchmark (100 runs timed with time.time(), mean only)
+with perf_counter_ns timing of every call, configurable warmup, batch-size
+and intra_op_num_threads sweeps, and latency percentiles
+(p50/p90/p99/p99.9) from an HDR histogram. Results are written as JSON so
+runs can be compared.
+"""
+
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+
+import numpy as np
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class HdrHistogram:
+    """
+    High-dynamic-range latency histogram (HdrHistogram bucket layout).
+
+    Values are integers (nanoseconds here) tracked with `significant_digits`
+    of precision across the whole range: each power-of-two bucket is split
+    into linear sub-buckets, so memory is logarithmic in the value range
+    while relative error stays below 10**-significant_digits.
+    """
+
+    def __init__(self, significant_digits=3):
+        self.significant_digits = significant_digits
+        largest_single_unit = 2 * 10 ** significant_digits
+        self.sub_bucket_count_magnitude = (largest_single_unit - 1).bit_length()
+        self.sub_bucket_half_count_magnitude = self.sub_bucket_count_magnitude - 1
+        self.sub_bucket_count = 1 << self.sub_bucket_count_magnitude
+        self.sub_bucket_half_count = self.sub_bucket_count >> 1
+        self.sub_bucket_mask = self.sub_bucket_count - 1
+        self.counts = {}
+        self.total_count = 0
+        self.min_value = None
+        self.max_value = 0
+
+    def _index(self, value):
+        bucket = (value | self.sub_bucket_mask).bit_length() - self.sub_bucket_count_magnitude
+        sub_bucket = value >> bucket
+        return ((bucket + 1) << self.sub_bucket_half_count_magnitude) + (sub_bucket - self.sub_bucket_half_count)
+
+    def _bounds(self, index):
+        """(lowest, highest) value equivalent to a counts index."""
+        bucket = (index >> self.sub_bucket_half_count_magnitude) - 1
+        sub_bucket = (index & (self.sub_bucket_half_count - 1)) + self.sub_bucket_half_count
+        if bucket < 0:
+            sub_bucket -= self.sub_bucket_half_count
+            bucket = 0
+        lowest = sub_bucket << bucket
+        return lowest, lowest + (1 << bucket) - 1
+
+    def record(self, value, count=1):
+        value = int(value)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += count
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = max(self.max_value, value)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += other.total_count
+        if other.min_value is not None:
+            self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
+        return self
+
+    def percentile(self, q):
+        """Highest equivalent value at percentile q (HdrHistogram convention)."""
+        if self.total_count == 0:
+            return 0
+        target = max(1, int(np.ceil(q / 100.0 * self.total_count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._bounds(index)[1], self.max_value)
+        return self.max_value
+
+    def mean(self):
+        if self.total_count == 0:
+            return 0.0
+        total = sum((sum(self._bounds(i)) / 2) * c for i, c in self.counts.items())
+        return total / self.total_count
+
+    def to_dict(self):
+        return {
+            'significant_digits': self.significant_digits,
+            'total_count': self.total_count,
+            'min': self.min_value,
+            'max': self.max_value,
+            'counts': {str(i): c for i, c in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data['significant_digits'])
+        hist.counts = {int(i): c for i, c in data['counts'].items()}
+        hist.total_count = data['total_count']
+        hist.min_value = data['min']
+        hist.max_value = data['max']
+        return hist
+
+
+def time_calls(predict_fn, inputs, iterations=1000, warmup=50, significant_digits=3):
+    """
+    Time individual predict calls.
+
+    Args:
+        predict_fn: Callable run on `inputs`
+        inputs: Model input (one batch)
+        iterations: Timed calls
+        warmup: Untimed calls first (JIT, allocator and cache warm-up)
+        significant_digits: HDR histogram precision
+
+    Returns:
+        tuple: (HdrHistogram of latencies in ns, total wall ns)
+    """
+    for _ in range(warmup):
+        predict_fn(inputs)
+
+    samples = np.empty(iterations, dtype=np.int64)
+    clock = time.perf_counter_ns
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = clock()
+        for i in range(iterations):
+            t0 = clock()
+            predict_fn(inputs)
+            samples[i] = clock() - t0
+        total_ns = clock() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    hist = HdrHistogram(significant_digits)
+    for value in samples.tolist():
+        hist.record(value)
+    return hist, total_ns
+
+
+def summarize(hist, total_ns, batch_size, iterations, **labels):
+    """Flatten a histogram into a JSON-friendly record."""
+    record = dict(labels)
+    record.update(
+        batch_size=batch_size,
+        iterations=iterations,
+        mean_ms=hist.mean() / 1e6,
+        max_ms=hist.max_value / 1e6,
+        throughput_samples_per_s=batch_size * iterations / (total_ns / 1e9),
+        histogram=hist.to_dict(),
+    )
+    for q in PERCENTILES:
+        record[f"p{q:g}_ms"] = hist.percentile(q) / 1e6
+    return record
+
+
+def sweep(make_predict, make_input, batch_sizes=(1, 8, 32, 128), thread_counts=(None,),
+          iterations=1000, warmup=50):
+    """
+    Benchmark every (threads, batch_size) combination.
+
+    Args:
+        make_predict: threads -> predict callable (e.g. a fresh ONNX session
+            with intra_op_num_threads=threads); threads is None when not swept
+        make_input: batch_size -> input array
+        batch_sizes: Batch sizes to try
+        thread_counts: Thread counts to try
+        iterations: Timed calls per combination
+        warmup: Untimed calls per combination
+
+    Returns:
+        list: One summarize() record per combination
+    """
+    records = []
+    for threads in thread_counts:
+        predict_fn = make_predict(threads)
+        for batch_size in batch_sizes:
+            hist, total_ns = time_calls(predict_fn, make_input(batch_size), iterations, warmup)
+            records.append(summarize(hist, total_ns, batch_size, iterations, threads=threads))
+    return records
+
+
+def onnx_predict_factory(model_path):
+    """
+    Build (make_predict, make_input) for an ONNX model.
+
+    make_predict(threads) opens its own session with intra_op_num_threads set,
+    so every thread count is measured on a fresh session.
+    """
+    import onnxruntime as ort
+
+    probe = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    dims = probe.get_inputs()[0].shape[1:]
+    if any(not isinstance(d, int) for d in dims):
+        raise ValueError(f"Non-batch input dims must be static, got {dims}")
+
+    def make_predict(threads):
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            sess_options.intra_op_num_threads = threads
+        session = ort.InferenceSession(model_path, sess_options, providers=['CPUExecutionProvider'])
+        input_name = session.get_inputs()[0].name
+        return lambda x: session.run(None, {input_name: x})[0]
+
+    def make_input(batch_size):
+        return np.random.default_rng(0).standard_normal((batch_size, *dims)).astype(np.float32)
+
+    return make_predict, make_input
+
+
+def compare(baseline, current):
+    """Print p50/p99 and throughput deltas between two result files."""
+    key = lambda r: (r.get('threads'), r['batch_size'])
+    old = {key(r): r for r in baseline['results']}
+    print(f"{'threads':>7} {'batch':>5} {'p50 Δ':>9} {'p99 Δ':>9} {'tput Δ':>9}")
+    for record in current['results']:
+        base = old.get(key(record))
+        if not base:
+            continue
+        delta = lambda m: (record[m] / base[m] - 1) * 100 if base[m] else 0.0
+        print(f"{str(record.get('threads')):>7} {record['batch_size']:>5} "
+              f"{delta('p50_ms'):>+8.1f}% {delta('p99_ms'):>+8.1f}% {delta('throughput_samples_per_s'):>+8.1f}%")
+
+
+def main():
+    """Run a sweep on an ONNX model (or a demo sklearn model) and save JSON."""
+    parser = argparse.ArgumentParser(description="Inference latency/throughput benchmark")
+    parser.add_argument('model', nargs='?', help='Path to an .onnx model (omit for an sklearn demo)')
+    parser.add_argument('--batch-sizes', default='1,8,32,128')
+    parser.add_argument('--threads', default='', help='Comma-separated intra_op_num_threads values (ONNX only)')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--compare', help='Baseline results file to compare against')
+    args = parser.parse_args()
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+    thread_counts = [int(t) for t in args.threads.split(',')] if args.threads else [None]
+
+    if args.model:
+        make_predict, make_input = onnx_predict_factory(args.model)
+    else:
+        from sklearn.datasets import make_classification
+        from sklearn.linear_model import LogisticRegression
+
+        X, y = make_classification(n_samples=2_000, n_features=20, random_state=42)
+        model = LogisticRegression(max_iter=500).fit(X, y)
+        make_predict = lambda threads: model.predict
+        make_input = lambda batch_size: X[:batch_size].astype(np.float32)
+
+    results = sweep(make_predict, make_input, batch_sizes, thread_counts, args.iterations, args.warmup)
+    report = {
+        'model': args.model or 'sklearn-demo',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+
+    print(f"{'threads':>7} {'batch':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'samples/s':>11}")
+    for r in results:
+        print(f"{str(r['threads']):>7} {r['batch_size']:>5} {r['p50_ms']:>8.3f} {r['p90_ms']:>8.3f} "
+              f"{r['p99_ms']:>8.3f} {r['p99.9_ms']:>9.3f} {r['throughput_samples_per_s']:>11.0f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
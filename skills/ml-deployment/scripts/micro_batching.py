@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Dynamic micro-batching for model serving.
+MicroBatcher queues concurrent asyncio predict() calls, coalesces them into
+one batch (up to max_batch_size rows or max_wait_ms after the first request),
+runs a single batched model call in a worker thread and scatters the rows of
+the result back to the callers. Works with any callable that maps an
+(n, n_features) array to n predictions: ONNXInference.predict,
+sklearn's model.predict, etc.
+
+FastAPI usage:
+
+    batcher = MicroBatcher(model.predict, max_batch_size=64, max_wait_ms=2)
+
+    @app.on_event("startup")
+    async def start_batcher():
+        await batcher.start()
+
+    @app.post("/predict")
+    async def predict(request: PredictRequest):
+        prediction = await batcher.predict(request.features)
+        return PredictResponse(prediction=float(prediction))
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row requests into batched model calls."""
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0,
+                 max_concurrent_batches=1, dtype=np.float32):
+        """
+        Args:
+            predict_fn: Callable taking an (n, n_features) array
+            max_batch_size: Most rows per model call
+            max_wait_ms: Longest a request waits for companions
+            max_concurrent_batches: Batches allowed in flight at once
+            dtype: dtype of the stacked input batch
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.dtype = dtype
+        self.max_concurrent_batches = max_concurrent_batches
+        self._executor = None
+        self._slots = None
+        self._queue = None
+        self._task = None
+        self._inflight = set()
+        self.batches = 0
+        self.rows = 0
+
+    async def start(self):
+        """Start the batching loop on the running event loop."""
+        if self._task is None:
+            # Recreated on every start, so a stopped batcher can be restarted
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_batches,
+                                                thread_name_prefix='microbatch')
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the loop; batches in flight finish, requests not yet dispatched are cancelled."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+        # Let dispatched batches resolve their callers before the pool goes away
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+        # Every submitted call has completed, so this does not block the loop
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    async def predict(self, features):
+        """Predict one row; resolves when its batch completes."""
+        if self._task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future))
+        return await future
+
+    @property
+    def mean_batch_size(self):
+        return self.rows / self.batches if self.batches else 0.0
+
+    async def _collect(self):
+        """Wait for one request, then gather more until full or timed out."""
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+
+        try:
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Requests already off the queue would otherwise never resolve
+            self._cancel(batch)
+            raise
+        return batch
+
+    @staticmethod
+    def _cancel(batch):
+        for _, future in batch:
+            future.cancel()
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                self._cancel(batch)
+                raise
+            # Keep a reference so the dispatch task is not garbage-collected
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch):
+        futures = [future for _, future in batch]
+        try:
+            inputs = np.asarray([features for features, _ in batch], dtype=self.dtype)
+            loop = asyncio.get_running_loop()
+            outputs = await loop.run_in_executor(self._executor, self.predict_fn, inputs)
+            if len(outputs) != len(batch):
+                raise ValueError(f"predict_fn returned {len(outputs)} outputs for {len(batch)} rows")
+            self.batches += 1
+            self.rows += len(batch)
+            for future, output in zip(futures, outputs):
+                if not future.done():
+                    future.set_result(output)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100.0 * len(sorted_values)))]
+
+
+async def _drive(call, rows, concurrency):
+    """Issue len(rows) requests with `concurrency` in flight; collect latencies."""
+    latencies = []
+    next_row = iter(rows)
+
+    async def client():
+        for row in next_row:
+            start = time.perf_counter()
+            await call(row)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'throughput_rps': len(rows) / elapsed,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+    }
+
+
+async def benchmark(predict_fn, rows, concurrency=64, max_batch_size=64, max_wait_ms=2.0):
+    """
+    Compare per-request inference with micro-batching under the same load.
+
+    Args:
+        predict_fn: Callable taking an (n, n_features) array
+        rows: Request payloads (one feature row each)
+        concurrency: Requests in flight
+        max_batch_size: Batcher max batch size
+        max_wait_ms: Batcher max wait
+
+    Returns:
+        dict: {'per_request': {...}, 'micro_batched': {...}} with
+            throughput_rps, p50_ms, p99_ms (plus mean_batch_size)
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+
+    async def per_request(row):
+        # The Quick Start path: one single-row model call per request
+        return await loop.run_in_executor(executor, predict_fn, np.asarray([row], dtype=np.float32))
+
+    results = {'per_request': await _drive(per_request, rows, concurrency)}
+    executor.shutdown()
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    await batcher.start()
+    results['micro_batched'] = await _drive(batcher.predict, rows, concurrency)
+    results['micro_batched']['mean_batch_size'] = batcher.mean_batch_size
+    await batcher.stop()
+    return results
+
+
+def main():
+    """Benchmark an in-process sklearn model with and without micro-batching."""
+    from sklearn.datasets import make_classification
+    from sklearn.ensemble import RandomForestClassifier
+
+    parser = argparse.ArgumentParser(description="Micro-batching benchmark")
+    parser.add_argument('--requests', type=int, default=5_000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    X, y = make_classification(n_samples=2_000, n_features=20, random_state=42)
+    model = RandomForestClassifier(n_estimators=50, random_state=42).fit(X, y)
+    rows = [X[i % len(X)].tolist() for i in range(args.requests)]
+
+    results = asyncio.run(benchmark(
+        model.predict, rows, args.concurrency, args.max_batch_size, args.max_wait_ms,
+    ))
+    for path, stats in results.items():
+        extra = f", mean batch {stats['mean_batch_size']:.1f}" if 'mean_batch_size' in stats else ''
+        print(f"{path:>14}: {stats['throughput_rps']:8.0f} req/s, "
+              f"p50 {stats['p50_ms']:6.2f} ms, p99 {stats['p99_ms']:6.2f} ms{extra}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Warm model cache for multi-model serving.
+ModelCache keeps loaded models (ONNX InferenceSessions, joblib/pickle
+estimators, .npy/.npz weight arrays) in an LRU bounded by a memory budget, so
+A/B flows that switch between model versions do not reload them from disk on
+every request. Loads run in a background thread pool; concurrent requests for
+the same model share one load. Where the format allows, weights are
+memory-mapped (joblib mmap_mode='r', np.load mmap_mode='r'), so the OS page
+cache is shared across worker processes and eviction is cheap.
+
+Usage:
+
+    cache = ModelCache(max_bytes=2 * 1024**3)
+    cache.prefetch('models/v2.onnx')          # warm in the background
+    model = cache.get('models/v1.joblib')     # blocks only on a miss
+    print(cache.stats())
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+
+def load_onnx(path):
+    import onnxruntime as ort
+
+    sess_options = ort.SessionOptions()
+    sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(path, sess_options, providers=['CPUExecutionProvider'])
+
+
+def load_joblib(path, mmap=True):
+    """joblib.load; numpy arrays in uncompressed dumps are memory-mapped."""
+    import joblib
+
+    return joblib.load(path, mmap_mode='r' if mmap else None)
+
+
+def load_numpy(path, mmap=True):
+    return np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False)
+
+
+LOADERS = {
+    '.onnx': load_onnx,
+    '.joblib': load_joblib,
+    '.pkl': load_joblib,
+    '.npy': load_numpy,
+    '.npz': load_numpy,
+}
+
+
+def default_loader(path, mmap=True):
+    """Pick a loader from the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in LOADERS:
+        raise ValueError(f"No loader for {ext!r} files; pass loader=...")
+    loader = LOADERS[ext]
+    return loader(path) if loader is load_onnx else loader(path, mmap=mmap)
+
+
+class ModelCache:
+    """LRU cache of loaded models with a byte budget and background loading."""
+
+    def __init__(self, max_bytes=1024 ** 3, max_workers=2, mmap=True, size_fn=None):
+        """
+        Args:
+            max_bytes: Memory budget across cached models
+            max_workers: Concurrent background loads
+            mmap: Memory-map weights where the format allows
+            size_fn: (key, model) -> bytes charged against the budget
+                (default: size of the model file on disk)
+        """
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+        self.size_fn = size_fn or (lambda key, model: os.path.getsize(key))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-load')
+        self._entries = OrderedDict()  # key -> (model, nbytes), oldest first
+        self._loading = {}  # key -> Future shared by concurrent requests
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(self, key, loader=None, timeout=None):
+        """Return a loaded model, loading it (once) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            future = self._start_load(key, loader)
+        return future.result(timeout)
+
+    def prefetch(self, key, loader=None) -> Future:
+        """Load a model in the background without counting a hit or miss."""
+        with self._lock:
+            if key in self._entries:
+                future = Future()
+                future.set_result(self._entries[key][0])
+                return future
+            return self._start_load(key, loader)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def evict(self, key):
+        """Drop a model from the cache (e.g. when a version is retired)."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'models': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'loads': self.loads,
+                'load_errors': self.load_errors,
+                'evictions': self.evictions,
+                'mean_load_ms': self.load_seconds / self.loads * 1000 if self.loads else 0.0,
+                'loading': len(self._loading),
+            }
+
+    def _start_load(self, key, loader):
+        # Caller holds self._lock
+        future = self._loading.get(key)
+        if future is None:
+            future = self._executor.submit(self._load, key, loader)
+            self._loading[key] = future
+        return future
+
+    def _load(self, key, loader):
+        start = time.perf_counter()
+        try:
+            model = loader(key) if loader else default_loader(key, mmap=self.mmap)
+            nbytes = self.size_fn(key, model)
+        except Exception:
+            with self._lock:
+                self.load_errors += 1
+                self._loading.pop(key, None)
+            raise
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.loads += 1
+            self.load_seconds += elapsed
+            self._entries[key] = (model, nbytes)
+            self.bytes += nbytes
+            self._loading.pop(key, None)
+            # Evict least recently used, but never the model just loaded
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.bytes -= evicted_bytes
+                self.evictions += 1
+        return model
+
+
+def main():
+    """Save a few model versions, then compare cold loads with cache hits."""
+    import tempfile
+    import joblib
+    from sklearn.datasets import make_classification
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = make_classification(n_samples=2_000, n_features=20, random_state=42)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for version in range(4):
+            model = RandomForestClassifier(n_estimators=50, random_state=version).fit(X, y)
+            path = os.path.join(tmp, f"model_v{version}.joblib")
+            joblib.dump(model, path)
+            paths.append(path)
+
+        budget = sum(os.path.getsize(p) for p in paths[:3])
+        cache = ModelCache(max_bytes=budget)
+        for future in [cache.prefetch(p) for p in paths[:3]]:
+            future.result()
+
+        start = time.perf_counter()
+        for i in range(1_000):
+            cache.get(paths[i % 3]).predict(X[:1])
+        warm = (time.perf_counter() - start) / 1_000
+
+        start = time.perf_counter()
+        for i in range(20):
+            joblib.load(paths[i % 3]).predict(X[:1])
+        cold = (time.perf_counter() - start) / 20
+
+        cache.get(paths[3])  # over budget: evicts the least recently used
+        cache.close()
+        print(f"cold load + predict: {cold * 1000:.2f} ms, cached predict: {warm * 1000:.2f} ms")
+        print(cache.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Approximate nearest-neighbour search for the nlp-basics skill.
+Brute-force search (SemanticSearch, EmbeddingEngine.semantic_search, and
+even the chunked VectorIndex) is O(corpus) per query. IVFIndex is an
+inverted-file ("IVF-flat") index:
+
+- a coarse quantizer (spherical k-means centroids, trained on a sample)
+  splits the corpus into n_lists inverted lists;
+- each normalized vector is stored, uncompressed, in its nearest
+  centroid's list;
+- a query is scored against the centroids, then exactly against the
+  vectors of its n_probe closest lists only.
+
+n_probe trades recall for latency, and run_benchmark() prints the
+recall@k / latency curve against exact VectorIndex results. Queries in a
+batch are grouped by list, so each probed list costs one matrix multiply.
+The index supports incremental add() after training; save() writes one
+contiguous CSR-style layout, and load() memory-maps it. search() returns
+the same [(document or id, score)] shape as VectorIndex.search and
+SemanticSearch.search.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from vector_index import VectorIndex, l2_normalize, merge_topk
+
+
+def spherical_kmeans(x, n_clusters, n_iter=10, seed=0, chunk_size=65_536):
+    """
+    K-means on the unit sphere (cosine similarity).
+
+    Args:
+        x: (n, dim) L2-normalized float32 vectors
+        n_clusters: Number of centroids
+        n_iter: Lloyd iterations
+        seed: Random seed for the initial centroids
+
+    Returns:
+        np.ndarray: (n_clusters, dim) normalized centroids
+    """
+    rng = np.random.default_rng(seed)
+    if len(x) < n_clusters:
+        raise ValueError(f"Need at least n_clusters={n_clusters} training vectors, got {len(x)}")
+    centroids = x[rng.choice(len(x), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = assign_lists(x, centroids, chunk_size)
+        # Per-cluster sums via sort + reduceat (np.add.at is far slower)
+        order = np.argsort(assign, kind='stable')
+        counts = np.bincount(assign, minlength=n_clusters)
+        present = np.flatnonzero(counts)
+        sums = np.zeros_like(centroids)
+        sums[present] = np.add.reduceat(x[order], np.concatenate([[0], np.cumsum(counts[present])[:-1]]))
+        # Re-seed empty clusters from random points
+        empty = counts == 0
+        sums[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+        centroids = l2_normalize(sums)
+    return centroids
+
+
+def assign_lists(x, centroids, chunk_size=65_536):
+    """Index of the most similar centroid for each row, in chunks."""
+    assign = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), chunk_size):
+        assign[start:start + chunk_size] = np.argmax(x[start:start + chunk_size] @ centroids.T, axis=1)
+    return assign
+
+
+class IVFIndex:
+    """Inverted-file index with exact scoring inside the probed lists."""
+
+    def __init__(self, dim, n_lists=1024, n_probe=8, dtype=np.float32):
+        """
+        Args:
+            dim: Embedding dimension
+            n_lists: Inverted lists (1-4 x sqrt(corpus size) is a good start)
+            n_probe: Lists scanned per query (recall vs latency)
+            dtype: Storage dtype for list vectors
+        """
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.dtype = np.dtype(dtype)
+        self.centroids = None
+        self._vectors = [np.empty((0, dim), dtype=self.dtype) for _ in range(n_lists)]
+        self._ids = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        self._counts = np.zeros(n_lists, dtype=np.int64)
+        self.count = 0
+        self.documents = []
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def __len__(self):
+        return self.count
+
+    def train(self, sample, n_iter=10, seed=0):
+        """Fit the coarse quantizer on a representative sample."""
+        self.centroids = spherical_kmeans(l2_normalize(sample), self.n_lists, n_iter, seed)
+        return self
+
+    def add(self, embeddings, documents=None):
+        """
+        Append vectors to their nearest lists.
+
+        If the index is untrained, the quantizer is first fit on a random
+        sample of this batch, which then needs at least n_lists vectors.
+        Otherwise call train() on a representative sample first.
+        """
+        embeddings = l2_normalize(embeddings).reshape(-1, self.dim)
+        if not self.is_trained:
+            if len(embeddings) < self.n_lists:
+                raise ValueError(
+                    f"IVFIndex is untrained and this batch has {len(embeddings)} vectors for "
+                    f"n_lists={self.n_lists}; call train() with at least n_lists vectors first")
+            # A random sample, so sorted or clustered input does not bias the centroids
+            sample_size = min(len(embeddings), self.n_lists * 32)
+            rows = np.random.default_rng(0).choice(len(embeddings), sample_size, replace=False)
+            self.train(embeddings[np.sort(rows)])
+
+        ids = np.arange(self.count, self.count + len(embeddings))
+        assign = assign_lists(embeddings, self.centroids)
+        order = np.argsort(assign, kind='stable')
+        bounds = np.searchsorted(assign[order], np.arange(self.n_lists + 1))
+        for lst in np.flatnonzero(np.diff(bounds)):
+            rows = order[bounds[lst]:bounds[lst + 1]]
+            self._append(lst, embeddings[rows], ids[rows])
+
+        self.count += len(embeddings)
+        if documents is not None:
+            self.documents.extend(documents)
+        return self
+
+    def _append(self, lst, vectors, ids):
+        count = self._counts[lst]
+        needed = count + len(vectors)
+        # Lists loaded from disk are read-only views; the first add copies them
+        if needed > len(self._vectors[lst]) or not self._vectors[lst].flags.writeable:
+            capacity = max(needed, 2 * len(self._vectors[lst]), 16)
+            grown = np.empty((capacity, self.dim), dtype=self.dtype)
+            grown[:count] = self._vectors[lst][:count]
+            grown_ids = np.empty(capacity, dtype=np.int64)
+            grown_ids[:count] = self._ids[lst][:count]
+            self._vectors[lst], self._ids[lst] = grown, grown_ids
+        self._vectors[lst][count:needed] = vectors
+        self._ids[lst][count:needed] = ids
+        self._counts[lst] = needed
+
+    def search_batch(self, queries, top_k=5, n_probe=None):
+        """
+        Approximate top-k by cosine similarity.
+
+        Returns:
+            tuple: (scores, ids), each (n_queries, top_k), best first; rows
+                with fewer than top_k candidates are padded with -inf / -1
+        """
+        queries = l2_normalize(queries).reshape(-1, self.dim)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        best_scores = np.full((len(queries), top_k), -np.inf, dtype=np.float32)
+        best_ids = np.full((len(queries), top_k), -1, dtype=np.int64)
+        if not self.is_trained or self.count == 0:
+            return best_scores, best_ids
+
+        coarse = queries @ self.centroids.T
+        probes = np.argpartition(-coarse, n_probe - 1, axis=1)[:, :n_probe]
+
+        # Group (query, list) pairs by list so each list is scored once
+        query_rows = np.repeat(np.arange(len(queries)), n_probe)
+        lists = probes.ravel()
+        order = np.argsort(lists, kind='stable')
+        lists, query_rows = lists[order], query_rows[order]
+        bounds = np.flatnonzero(np.diff(lists)) + 1
+        for group_lists, rows in zip(np.split(lists, bounds), np.split(query_rows, bounds)):
+            lst = group_lists[0]
+            count = self._counts[lst]
+            if count == 0:
+                continue
+            vectors = self._vectors[lst][:count]
+            if vectors.dtype != np.float32:
+                vectors = vectors.astype(np.float32)
+            scores = queries[rows] @ vectors.T
+            k = min(top_k, count)
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            merged_scores, merged_ids = merge_topk(
+                np.concatenate([best_scores[rows], np.take_along_axis(scores, part, axis=1)], axis=1),
+                np.concatenate([best_ids[rows], self._ids[lst][part]], axis=1),
+                top_k,
+            )
+            best_scores[rows], best_ids[rows] = merged_scores, merged_ids
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_ids, order, axis=1)
+
+    def search(self, query, top_k=5, n_probe=None):
+        """VectorIndex.search shape: [(document or id, score), ...]."""
+        scores, ids = self.search_batch(query, top_k, n_probe)
+        return [(self.documents[i] if self.documents else int(i), float(s))
+                for i, s in zip(ids[0], scores[0]) if i >= 0]
+
+    def save(self, path):
+        """Write centroids and lists in one contiguous (CSR) layout."""
+        if not self.is_trained:
+            # np.save would pickle centroids=None, which load() cannot read back
+            raise ValueError("IVFIndex is untrained and has nothing to save; call train() or add() first")
+        os.makedirs(path, exist_ok=True)
+        offsets = np.concatenate([[0], np.cumsum(self._counts)])
+        np.save(os.path.join(path, 'centroids.npy'), self.centroids)
+        np.save(os.path.join(path, 'offsets.npy'), offsets)
+        vectors = np.lib.format.open_memmap(os.path.join(path, 'vectors.npy'), mode='w+',
+                                            dtype=self.dtype, shape=(int(offsets[-1]), self.dim))
+        ids = np.empty(int(offsets[-1]), dtype=np.int64)
+        for lst in range(self.n_lists):
+            vectors[offsets[lst]:offsets[lst + 1]] = self._vectors[lst][:self._counts[lst]]
+            ids[offsets[lst]:offsets[lst + 1]] = self._ids[lst][:self._counts[lst]]
+        vectors.flush()
+        del vectors
+        np.save(os.path.join(path, 'ids.npy'), ids)
+        with open(os.path.join(path, 'index.json'), 'w') as f:
+            json.dump({'dim': self.dim, 'n_lists': self.n_lists, 'n_probe': self.n_probe,
+                       'dtype': self.dtype.name, 'count': self.count}, f)
+        if self.documents:
+            with open(os.path.join(path, 'documents.json'), 'w') as f:
+                json.dump(self.documents, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a saved index; list vectors are memory-mapped views by default."""
+        with open(os.path.join(path, 'index.json'), 'r') as f:
+            meta = json.load(f)
+        index = cls(meta['dim'], meta['n_lists'], meta['n_probe'], meta['dtype'])
+        index.centroids = np.load(os.path.join(path, 'centroids.npy'))
+        offsets = np.load(os.path.join(path, 'offsets.npy'))
+        vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r' if mmap else None)
+        ids = np.load(os.path.join(path, 'ids.npy'))
+        for lst in range(index.n_lists):
+            index._vectors[lst] = vectors[offsets[lst]:offsets[lst + 1]]
+            index._ids[lst] = ids[offsets[lst]:offsets[lst + 1]]
+        index._counts = np.diff(offsets)
+        index.count = meta['count']
+        documents_path = os.path.join(path, 'documents.json')
+        if os.path.exists(documents_path):
+            with open(documents_path, 'r') as f:
+                index.documents = json.load(f)
+        return index
+
+
+def recall_at_k(approx_ids, exact_ids):
+    """Mean fraction of the exact top-k found by the approximate search."""
+    k = exact_ids.shape[1]
+    return float(np.mean([len(set(a) & set(e)) / k for a, e in zip(approx_ids, exact_ids)]))
+
+
+def run_benchmark(corpus, queries, top_k=10, n_lists=None, n_probes=(1, 2, 4, 8, 16, 32, 64, 128)):
+    """
+    Recall@k and latency for each n_probe, against exact search.
+
+    Returns:
+        list: {'n_probe', 'recall', 'ms_per_query'} records, plus one
+            'exact' record for VectorIndex
+    """
+    n_lists = n_lists or int(2 * np.sqrt(len(corpus)))
+    exact = VectorIndex(corpus.shape[1], initial_capacity=len(corpus)).add(corpus)
+    start = time.perf_counter()
+    _, exact_ids = exact.search_batch(queries, top_k)
+    results = [{'n_probe': 'exact', 'recall': 1.0,
+                'ms_per_query': (time.perf_counter() - start) / len(queries) * 1000}]
+
+    index = IVFIndex(corpus.shape[1], n_lists=n_lists)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    index.train(corpus[rng.choice(len(corpus), min(len(corpus), n_lists * 32), replace=False)])
+    index.add(corpus)
+    build = time.perf_counter() - start
+
+    for n_probe in n_probes:
+        if n_probe > n_lists:
+            break
+        start = time.perf_counter()
+        _, ids = index.search_batch(queries, top_k, n_probe)
+        elapsed = (time.perf_counter() - start) / len(queries) * 1000
+        results.append({'n_probe': n_probe, 'recall': recall_at_k(ids, exact_ids), 'ms_per_query': elapsed})
+    return results, build
+
+
+def main():
+    """Print the recall@k / latency curve on clustered synthetic embeddings."""
+    parser = argparse.ArgumentParser(description="IVF index recall/latency benchmark")
+    parser.add_argument('--n', type=int, default=500_000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=256)
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+
+    # Sentence embeddings lie near a low-dimensional manifold: project a
+    # 24-d latent Gaussian into dim and add a little isotropic noise
+    rng = np.random.default_rng(0)
+    projection = rng.standard_normal((24, args.dim), dtype=np.float32)
+
+    def sample(n):
+        latent = rng.standard_normal((n, 24), dtype=np.float32)
+        return latent @ projection + 0.5 * rng.standard_normal((n, args.dim), dtype=np.float32)
+
+    corpus, queries = sample(args.n), sample(args.queries)
+
+    results, build = run_benchmark(corpus, queries, args.top_k)
+    print(f"{args.n:,} x {args.dim}, build {build:.1f} s")
+    print(f"{'n_probe':>8} {'recall@' + str(args.top_k):>10} {'ms/query':>9}")
+    for r in results:
+        print(f"{r['n_probe']:>8} {r['recall']:>10.3f} {r['ms_per_query']:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
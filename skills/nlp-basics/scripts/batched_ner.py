@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Batched named-entity extraction for the nlp-basics skill.
+NERExtractor.extract_batch in the NLP agent loops extract_entities over one
+text at a time, so the model never sees a batch, and post-processing groups
+entities with repeated dict lookups. BatchedNER:
+
+- tokenizes every text, sorts the texts by token count, and cuts the sorted
+  order into fixed-size batches, so each batch pads only to its own
+  (similar) lengths, rounded up to a multiple of pad_multiple;
+- runs one model call per batch;
+- takes argmax, softmax score, B-/I- span merging ("simple" aggregation,
+  entity score = mean token score) and min_score filtering as array
+  operations over the whole padded batch;
+- scatters results back to the input order, in the same {entity_group:
+  [{'text', 'score', 'start', 'end'}]} shape as extract_entities.
+
+Models implement a small protocol: labels (list of BIO tags),
+encode(texts) -> [(ids, offsets)], and forward(ids, mask) -> (B, L, C)
+logits. HFTokenClassifier wraps a Hugging Face token-classification model.
+StubTokenClassifier is a deterministic NumPy stand-in for CPU benchmarks.
+"""
+
+import re
+import sys
+import time
+import zlib
+
+import numpy as np
+
+NER_LABELS = ['O', 'B-PER', 'I-PER', 'B-ORG', 'I-ORG', 'B-LOC', 'I-LOC', 'B-MISC', 'I-MISC']
+WORD_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+class StubTokenClassifier:
+    """
+    Deterministic token classifier for benchmarks.
+
+    Token ids come from CRC32-hashed words. The "network" is a random
+    embedding followed by a two-layer MLP, so compute scales with padded
+    tokens the way a transformer's does. call_overhead_ms simulates the
+    fixed per-forward cost (framework dispatch, host/device transfer) that
+    batching amortizes.
+    """
+
+    def __init__(self, labels=NER_LABELS, vocab_size=30_000, hidden=256, call_overhead_ms=1.0, seed=0):
+        rng = np.random.default_rng(seed)
+        self.labels = list(labels)
+        self.vocab_size = vocab_size
+        self.call_overhead = call_overhead_ms / 1000.0
+        self.embedding = rng.standard_normal((vocab_size, 64)).astype(np.float32)
+        self.w1 = (rng.standard_normal((64, hidden)) / 8).astype(np.float32)
+        self.w2 = (rng.standard_normal((hidden, len(labels))) / 4).astype(np.float32)
+        # Bias towards 'O' so most tokens are not entities, as in real text
+        self.bias = np.zeros(len(labels), dtype=np.float32)
+        self.bias[0] = 2.0
+
+    def encode(self, texts):
+        encoded = []
+        for text in texts:
+            matches = list(WORD_PATTERN.finditer(text))
+            ids = np.fromiter((zlib.crc32(m.group().encode('utf-8')) % self.vocab_size for m in matches),
+                              dtype=np.int64, count=len(matches))
+            offsets = np.array([m.span() for m in matches], dtype=np.int64).reshape(-1, 2)
+            encoded.append((ids, offsets))
+        return encoded
+
+    def forward(self, ids, mask):
+        if self.call_overhead:
+            time.sleep(self.call_overhead)
+        hidden = np.tanh(self.embedding[ids] @ self.w1)
+        return hidden @ self.w2 + self.bias
+
+
+class HFTokenClassifier:
+    """Hugging Face token-classification model behind the BatchedNER protocol."""
+
+    def __init__(self, model_name='dslim/bert-base-NER', device=None, max_length=512):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForTokenClassification
+
+        self.torch = torch
+        self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        self.model = AutoModelForTokenClassification.from_pretrained(model_name).to(self.device).eval()
+        self.labels = [self.model.config.id2label[i] for i in range(self.model.config.num_labels)]
+        self.max_length = max_length
+
+    def encode(self, texts):
+        batch = self.tokenizer(list(texts), add_special_tokens=True, truncation=True,
+                               max_length=self.max_length, return_offsets_mapping=True)
+        encoded = []
+        for ids, offsets in zip(batch['input_ids'], batch['offset_mapping']):
+            offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+            encoded.append((np.asarray(ids, dtype=np.int64), offsets))
+        return encoded
+
+    def forward(self, ids, mask):
+        with self.torch.inference_mode():
+            logits = self.model(input_ids=self.torch.from_numpy(ids).to(self.device),
+                                attention_mask=self.torch.from_numpy(mask).to(self.device)).logits
+        return logits.float().cpu().numpy()
+
+
+class BatchedNER:
+    """Length-bucketed, batched NER with vectorized post-processing."""
+
+    def __init__(self, model, batch_size=32, min_score=0.8, pad_multiple=8, sort_by_length=True):
+        """
+        Args:
+            model: Object with labels, encode() and forward() (see module doc)
+            batch_size: Texts per model call
+            min_score: Default minimum entity score
+            pad_multiple: Round padded lengths up to a multiple of this
+            sort_by_length: Bucket by length (False keeps input order)
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.min_score = min_score
+        self.pad_multiple = pad_multiple
+        self.sort_by_length = sort_by_length
+        self.padded_tokens = 0
+        self.real_tokens = 0
+
+        # Per label: entity type id (0 = outside) and whether it opens a span
+        types = sorted({label[2:] for label in model.labels if label != 'O'})
+        self.entity_types = [None] + types
+        self._type_of = np.array([0 if label == 'O' else types.index(label[2:]) + 1
+                                  for label in model.labels], dtype=np.int64)
+        self._is_begin = np.array([label.startswith('B-') for label in model.labels])
+
+    @property
+    def padding_ratio(self):
+        return self.padded_tokens / self.real_tokens if self.real_tokens else 0.0
+
+    def extract_entities(self, text, min_score=None):
+        """Extract named entities with confidence filtering."""
+        return self.extract_batch([text], min_score)[0]
+
+    def extract_batch(self, texts, min_score=None):
+        """Extract entities from multiple texts, in input order."""
+        min_score = self.min_score if min_score is None else min_score
+        encoded = self.model.encode(texts)
+        lengths = np.array([len(ids) for ids, _ in encoded], dtype=np.int64)
+        order = np.argsort(lengths, kind='stable') if self.sort_by_length else np.arange(len(texts))
+
+        results = [None] * len(texts)
+        for start in range(0, len(texts), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for index, grouped in zip(batch, self._run_batch(texts, encoded, lengths, batch, min_score)):
+                results[index] = grouped
+        return results
+
+    def _run_batch(self, texts, encoded, lengths, batch, min_score):
+        batch_lengths = lengths[batch]
+        width = max(1, int(batch_lengths.max()))
+        width = -(-width // self.pad_multiple) * self.pad_multiple
+        ids = np.zeros((len(batch), width), dtype=np.int64)
+        offsets = np.zeros((len(batch), width, 2), dtype=np.int64)
+        mask = np.arange(width) < batch_lengths[:, None]
+        for row, index in enumerate(batch):
+            n = batch_lengths[row]
+            ids[row, :n], offsets[row, :n] = encoded[index]
+        self.padded_tokens += ids.size
+        self.real_tokens += int(batch_lengths.sum())
+
+        logits = self.model.forward(ids, mask.astype(np.int64))
+
+        # Softmax score of the argmax label, for every token at once
+        label_ids = logits.argmax(axis=-1)
+        shifted = logits - logits.max(axis=-1, keepdims=True)
+        scores = 1.0 / np.exp(shifted).sum(axis=-1)
+
+        types = self._type_of[label_ids]
+        # Padding and special tokens ([CLS]/[SEP] have empty offsets) are never entities
+        valid = mask & (offsets[..., 1] > offsets[..., 0])
+        types[~valid] = 0
+        begins = self._is_begin[label_ids]
+
+        # A span starts at a B- tag or where the type changes (incl. row starts)
+        previous = np.zeros_like(types)
+        previous[:, 1:] = types[:, :-1]
+        inside = (types > 0).ravel()
+        starts = (inside & (begins.ravel() | (types != previous).ravel()))
+        entity = np.cumsum(starts) - 1
+
+        grouped = [{} for _ in batch]
+        positions = np.flatnonzero(inside)
+        if len(positions) == 0:
+            return grouped
+        entity = entity[positions]
+        first = np.r_[True, entity[1:] != entity[:-1]]
+        last = np.r_[entity[1:] != entity[:-1], True]
+        counts = np.diff(np.r_[np.flatnonzero(first), len(positions)])
+        mean_scores = np.add.reduceat(scores.ravel()[positions], np.flatnonzero(first)) / counts
+
+        keep = mean_scores >= min_score
+        first_pos, last_pos = positions[first][keep], positions[last][keep]
+        rows = first_pos // width
+        flat_offsets = offsets.reshape(-1, 2)
+        span_starts = flat_offsets[first_pos, 0]
+        span_ends = flat_offsets[last_pos, 1]
+        span_types = types.ravel()[first_pos]
+
+        for row, span_type, s, e, score in zip(rows.tolist(), span_types.tolist(), span_starts.tolist(),
+                                                span_ends.tolist(), mean_scores[keep].tolist()):
+            text = texts[batch[row]]
+            grouped[row].setdefault(self.entity_types[span_type], []).append(
+                {'text': text[s:e], 'score': round(score, 3), 'start': s, 'end': e})
+        return grouped
+
+
+def main():
+    """Compare the per-text loop with fixed-order and length-bucketed batching."""
+    rng = np.random.default_rng(0)
+    words = ['Alice', 'Bob', 'Paris', 'Acme', 'Corp', 'visited', 'the', 'office', 'in', 'London',
+             'and', 'met', 'with', 'Google', 'engineers', 'on', 'Monday', '.', ',', 'said']
+    lengths = np.clip(rng.lognormal(3.3, 0.8, size=2_000).astype(int), 3, 400)
+    texts = [' '.join(rng.choice(words, size=n)) for n in lengths]
+
+    model = StubTokenClassifier()
+    runs = {}
+    for name, batch_size, sort in (('per-text loop', 1, False), ('batched', 32, False),
+                                   ('bucketed', 32, True)):
+        ner = BatchedNER(model, batch_size=batch_size, min_score=0.5, sort_by_length=sort)
+        start = time.perf_counter()
+        runs[name] = ner.extract_batch(texts)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>14}: {elapsed:6.2f} s, {len(texts) / elapsed:7.0f} texts/s, "
+              f"padded/real tokens {ner.padding_ratio:.2f}")
+
+    reference = runs['per-text loop']
+    assert all(runs[name] == reference for name in runs)
+    n_entities = sum(len(v) for grouped in reference for v in grouped.values())
+    print(f"identical results across modes; {n_entities} entities")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
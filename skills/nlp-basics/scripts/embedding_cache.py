@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Persistent embedding cache for the nlp-basics skill.
+EmbeddingEngine.similarity re-encodes both texts on every call, and
+semantic_search re-encodes the whole corpus for every query. EmbeddingStore
+deduplicates texts by content hash (BLAKE2b over model id and text) and
+keeps their vectors in a memory-mapped float16/float32 file.
+
+On-disk layout (one directory per model):
+
+    meta.json     dim, dtype, model id
+    vectors.bin   row-major (capacity, dim) array, grown by doubling; row i
+                  starts at byte i * dim * itemsize
+    keys.bin      16-byte digest per row, in row order
+
+Vectors are flushed before their keys are appended, so a crash can only
+lose the last unflushed rows and never leaves a key pointing at garbage.
+CachedEmbeddingEngine has the same encode/similarity/semantic_search
+methods as the agent's EmbeddingEngine, backed by the store. HashingEncoder
+is a deterministic, dependency-light stand-in for SentenceTransformer in
+tests and benchmarks.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+
+import numpy as np
+
+DIGEST_SIZE = 16
+
+
+class HashingEncoder:
+    """Deterministic SentenceTransformer stand-in built on HashingVectorizer."""
+
+    def __init__(self, dim=384, ngram_range=(1, 2)):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.dim = dim
+        self.model_id = f"hashing-{dim}-{ngram_range[0]}-{ngram_range[1]}"
+        self._vectorizer = HashingVectorizer(n_features=dim, ngram_range=ngram_range,
+                                             alternate_sign=True, norm='l2')
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, convert_to_numpy=True):
+        return self._vectorizer.transform(texts).toarray().astype(np.float32)
+
+
+class EmbeddingStore:
+    """Content-addressed, memory-mapped store of embedding vectors."""
+
+    def __init__(self, path, dim, dtype=np.float16, model_id='', initial_capacity=1024):
+        """
+        Args:
+            path: Store directory (created if missing)
+            dim: Embedding dimension
+            dtype: np.float16 (half the disk and page cache) or np.float32
+            model_id: Encoder identity; opening a store with another id fails
+            initial_capacity: Rows allocated up front
+        """
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.model_id = model_id
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if (meta['dim'], meta['dtype'], meta['model_id']) != (dim, self.dtype.name, model_id):
+                raise ValueError(f"Store at {path} holds {meta}, not dim={dim} "
+                                 f"dtype={self.dtype.name} model_id={model_id!r}")
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump({'dim': dim, 'dtype': self.dtype.name, 'model_id': model_id}, f)
+
+        keys_path = os.path.join(path, 'keys.bin')
+        keys = b''
+        if os.path.exists(keys_path):
+            with open(keys_path, 'rb') as f:
+                keys = f.read()
+        # Ignore a torn trailing digest from an interrupted append
+        self.count = len(keys) // DIGEST_SIZE
+        self.index = {keys[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]: i for i in range(self.count)}
+        self._keys_file = open(keys_path, 'ab')
+        self._keys_file.truncate(self.count * DIGEST_SIZE)
+
+        self._vectors_path = os.path.join(path, 'vectors.bin')
+        row_bytes = dim * self.dtype.itemsize
+        existing = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        self._map(max(existing, self.count, initial_capacity))
+
+    def _map(self, capacity):
+        with open(self._vectors_path, 'ab') as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self.capacity = capacity
+        self.vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode='r+', shape=(capacity, self.dim))
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(f"{self.model_id}\0{text}".encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, text):
+        return self.key(text) in self.index
+
+    def lookup(self, texts):
+        """
+        Rows for texts already stored.
+
+        Returns:
+            tuple: (rows, digests) where rows[i] is -1 on a miss
+        """
+        digests = [self.key(t) for t in texts]
+        rows = np.fromiter((self.index.get(d, -1) for d in digests), dtype=np.int64, count=len(digests))
+        return rows, digests
+
+    def add(self, digests, vectors):
+        """Append vectors for new digests (already-present digests are skipped)."""
+        vectors = np.asarray(vectors)
+        with self._lock:
+            new = [(d, v) for d, v in zip(digests, vectors) if d not in self.index]
+            if not new:
+                return
+            # Also drop duplicates within this batch
+            new = list({d: v for d, v in new}.items())
+            needed = self.count + len(new)
+            if needed > self.capacity:
+                self.vectors.flush()
+                del self.vectors
+                self._map(max(needed, 2 * self.capacity))
+            start = self.count
+            self.vectors[start:needed] = np.stack([v for _, v in new]).astype(self.dtype)
+            self.vectors.flush()
+            self._keys_file.write(b''.join(d for d, _ in new))
+            self._keys_file.flush()
+            for offset, (digest, _) in enumerate(new):
+                self.index[digest] = start + offset
+            self.count = needed
+
+    def get_or_encode(self, texts, encode_fn, batch_size=32):
+        """
+        Embeddings for texts, encoding only those not in the store.
+
+        Args:
+            texts: List of strings (duplicates are encoded once)
+            encode_fn: Callable(list of str, batch_size) -> (n, dim) array
+
+        Returns:
+            np.ndarray: (len(texts), dim) float32
+        """
+        texts = list(texts)
+        rows, digests = self.lookup(texts)
+        missing = np.flatnonzero(rows < 0)
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if len(missing):
+            unique = {}
+            for i in missing:
+                unique.setdefault(digests[i], texts[i])
+            new_vectors = encode_fn(list(unique.values()), batch_size)
+            self.add(list(unique), new_vectors)
+
+        with self._lock:
+            if len(missing):
+                rows[missing] = [self.index[digests[i]] for i in missing]
+            # add() may remap concurrently; the old mapping still covers these rows
+            vectors = self.vectors
+        return np.asarray(vectors[rows], dtype=np.float32)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'vectors': self.count,
+            'bytes': self.count * self.dim * self.dtype.itemsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self.vectors.flush()
+            self._keys_file.close()
+
+
+class CachedEmbeddingEngine:
+    """EmbeddingEngine with every encode served through an EmbeddingStore."""
+
+    def __init__(self, model, cache_dir, dtype=np.float16, model_id=None):
+        """
+        Args:
+            model: SentenceTransformer (or HashingEncoder)
+            cache_dir: EmbeddingStore directory
+            dtype: Storage dtype
+            model_id: Store identity; pass the model name for SentenceTransformer
+                (default: the encoder's model_id, else its class name)
+        """
+        self.model = model
+        model_id = model_id or getattr(model, 'model_id', None) or type(model).__name__
+        self.store = EmbeddingStore(cache_dir, model.get_sentence_embedding_dimension(), dtype, model_id)
+
+    def _encode_uncached(self, texts, batch_size):
+        return self.model.encode(texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+
+    def encode(self, texts, batch_size=32, show_progress=False):
+        """Encode texts to embeddings (cached by content hash)."""
+        return self.store.get_or_encode(texts, self._encode_uncached, batch_size)
+
+    def similarity(self, text1, text2):
+        """Compute cosine similarity between two texts."""
+        emb1, emb2 = self.encode([text1, text2])
+        return float(np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2)))
+
+    def semantic_search(self, query, corpus, top_k=5):
+        """Find most similar texts in corpus (corpus embeddings come from the cache)."""
+        query_emb = self.encode([query])[0]
+        corpus_emb = self.encode(corpus)
+        similarities = corpus_emb @ query_emb / (
+            np.linalg.norm(corpus_emb, axis=1) * np.linalg.norm(query_emb) + 1e-12
+        )
+        top_k = min(top_k, len(corpus))
+        top = np.argpartition(-similarities, top_k - 1)[:top_k]
+        top = top[np.argsort(-similarities[top])]
+        return [(corpus[i], float(similarities[i])) for i in top]
+
+
+def main():
+    """Repeat semantic_search over one corpus, cold and then warm from disk."""
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(5_000)]
+    corpus = [' '.join(rng.choice(words, size=30)) for _ in range(20_000)]
+    queries = [' '.join(rng.choice(words, size=8)) for _ in range(20)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = CachedEmbeddingEngine(HashingEncoder(), tmp)
+        start = time.perf_counter()
+        engine.semantic_search(queries[0], corpus)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in queries[1:]:
+            engine.semantic_search(query, corpus)
+        warm = (time.perf_counter() - start) / (len(queries) - 1)
+        engine.store.close()
+
+        reopened = CachedEmbeddingEngine(HashingEncoder(), tmp)
+        start = time.perf_counter()
+        results = reopened.semantic_search(queries[0], corpus, top_k=3)
+        reloaded = time.perf_counter() - start
+
+        print(f"first query (encodes corpus): {cold * 1000:.0f} ms")
+        print(f"repeat queries (cache hits):  {warm * 1000:.0f} ms")
+        print(f"after reopening from disk:    {reloaded * 1000:.0f} ms")
+        print(f"top match {results[0][1]:.3f}; {reopened.store.stats()}")
+        reopened.store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
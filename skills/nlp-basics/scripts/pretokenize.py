@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Pre-tokenized dataset cache for the nlp-basics skill.
+fine_tune_classifier in the NLP agent runs tokenize_function over the whole
+dataset on every call and pads every map batch to its longest text. Here
+pretokenize() runs the tokenizer once and writes a length-sorted shard
+directory. The directory name is a fingerprint of the tokenizer (class,
+name, vocabulary, and the serialized backend for fast tokenizers), the
+truncation max_length and the data. Later runs and epochs open it
+memory-mapped, so examples are zero-copy views, and batches are padded
+dynamically to their own longest example.
+
+Shard layout (<cache_dir>/<fingerprint>/):
+
+    meta.json     fingerprint inputs, counts, dtype
+    tokens.bin    concatenated token ids (uint16 when the vocab fits, else int32)
+    offsets.npy   (n + 1,) int64 start of each example in tokens.bin
+    labels.npy    (n,) int64 labels
+    order.npy     (n,) original position of each (length-sorted) example
+
+Attention masks are not stored: without padding they are all ones, and
+dynamic_pad builds them per batch from the lengths.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import zlib
+
+import numpy as np
+
+
+def tokenizer_fingerprint(tokenizer, max_length):
+    """Stable identity of a tokenizer configuration."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(type(tokenizer).__name__.encode())
+    h.update(str(getattr(tokenizer, 'name_or_path', '')).encode())
+    h.update(str(len(tokenizer) if hasattr(tokenizer, '__len__') else '').encode())
+    backend = getattr(tokenizer, 'backend_tokenizer', None)
+    if backend is not None:
+        # Fast tokenizers serialize vocab, normalizer and post-processor
+        h.update(backend.to_str().encode())
+    h.update(str(max_length).encode())
+    return h.hexdigest()
+
+
+def data_fingerprint(texts, labels):
+    h = hashlib.blake2b(digest_size=16)
+    for text, label in zip(texts, labels):
+        h.update(text.encode('utf-8'))
+        h.update(b'\0%d\0' % int(label))
+    return h.hexdigest()
+
+
+def pretokenize(texts, labels, tokenizer, cache_dir, max_length=512, batch_size=1_000):
+    """
+    Tokenize once and cache as a length-sorted shard.
+
+    Args:
+        texts: List of strings
+        labels: List of int labels
+        tokenizer: HF-style tokenizer (callable returning {'input_ids': ...})
+        cache_dir: Root cache directory
+        max_length: Truncation length
+        batch_size: Texts per tokenizer call
+
+    Returns:
+        str: Shard directory (reused when the fingerprint already exists)
+    """
+    fingerprint = hashlib.blake2b(
+        (tokenizer_fingerprint(tokenizer, max_length) + data_fingerprint(texts, labels)).encode(),
+        digest_size=16).hexdigest()
+    path = os.path.join(cache_dir, fingerprint)
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        return path
+
+    sequences = []
+    for start in range(0, len(texts), batch_size):
+        encoded = tokenizer(list(texts[start:start + batch_size]), truncation=True,
+                            max_length=max_length, padding=False)
+        sequences.extend(encoded['input_ids'])
+
+    lengths = np.fromiter((len(s) for s in sequences), dtype=np.int64, count=len(sequences))
+    order = np.argsort(lengths, kind='stable')
+    vocab_size = len(tokenizer) if hasattr(tokenizer, '__len__') else 2 ** 31
+    dtype = np.uint16 if vocab_size <= 2 ** 16 else np.int32
+    offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+    np.cumsum(lengths[order], out=offsets[1:])
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.pretokenize-', dir=cache_dir)
+    try:
+        tokens = np.memmap(os.path.join(tmp, 'tokens.bin'), dtype=dtype, mode='w+',
+                           shape=(max(int(offsets[-1]), 1),))
+        for row, index in enumerate(order):
+            tokens[offsets[row]:offsets[row + 1]] = sequences[index]
+        tokens.flush()
+        del tokens
+        np.save(os.path.join(tmp, 'offsets.npy'), offsets)
+        np.save(os.path.join(tmp, 'labels.npy'), np.asarray(labels, dtype=np.int64)[order])
+        np.save(os.path.join(tmp, 'order.npy'), order)
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'tokenizer': str(getattr(tokenizer, 'name_or_path', type(tokenizer).__name__)),
+                       'max_length': max_length, 'n_examples': len(sequences),
+                       'n_tokens': int(offsets[-1]), 'dtype': np.dtype(dtype).name,
+                       'pad_token_id': getattr(tokenizer, 'pad_token_id', 0) or 0}, f)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # Another process published the same fingerprint first
+            shutil.rmtree(tmp)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return path
+
+
+def dynamic_pad(sequences, pad_token_id=0, pad_multiple=8):
+    """Pad a batch to its own longest sequence (rounded up to pad_multiple)."""
+    lengths = np.fromiter((len(s) for s in sequences), dtype=np.int64, count=len(sequences))
+    width = max(1, int(lengths.max()) if len(lengths) else 1)
+    width = -(-width // pad_multiple) * pad_multiple
+    input_ids = np.full((len(sequences), width), pad_token_id, dtype=np.int64)
+    for row, seq in enumerate(sequences):
+        input_ids[row, :len(seq)] = seq
+    attention_mask = (np.arange(width) < lengths[:, None]).astype(np.int64)
+    return input_ids, attention_mask
+
+
+class PretokenizedDataset:
+    """Zero-copy view of a pretokenize() shard."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.tokens = np.memmap(os.path.join(path, 'tokens.bin'), dtype=self.meta['dtype'], mode='r')
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'))
+        self.labels = np.load(os.path.join(path, 'labels.npy'))
+        self.order = np.load(os.path.join(path, 'order.npy'))
+        self.lengths = np.diff(self.offsets)
+        self.pad_token_id = self.meta['pad_token_id']
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        """{'input_ids', 'label'} for the i-th example in length order (a view)."""
+        return {'input_ids': self.tokens[self.offsets[i]:self.offsets[i + 1]], 'label': int(self.labels[i])}
+
+    def batches(self, batch_size=16, shuffle=True, seed=0, pad_multiple=8):
+        """
+        Dynamically padded batches.
+
+        Consecutive (similar-length) examples form each batch; with shuffle
+        the order of batches is permuted per seed (use the epoch number).
+
+        Yields:
+            dict: 'input_ids', 'attention_mask' (int64, (B, L_batch)) and 'labels'
+        """
+        starts = np.arange(0, len(self), batch_size)
+        if shuffle:
+            starts = np.random.default_rng(seed).permutation(starts)
+        for start in starts:
+            stop = min(start + batch_size, len(self))
+            sequences = [self.tokens[self.offsets[i]:self.offsets[i + 1]] for i in range(start, stop)]
+            input_ids, attention_mask = dynamic_pad(sequences, self.pad_token_id, pad_multiple)
+            yield {'input_ids': input_ids, 'attention_mask': attention_mask,
+                   'labels': self.labels[start:stop]}
+
+    def padded_tokens(self, batch_size=16, pad_multiple=8):
+        """Total tokens (incl. padding) one epoch of batches() processes."""
+        widths = self.lengths[np.minimum(np.arange(0, len(self), batch_size) + batch_size, len(self)) - 1]
+        sizes = np.diff(np.r_[np.arange(0, len(self), batch_size), len(self)])
+        return int((-(-np.maximum(widths, 1) // pad_multiple) * pad_multiple * sizes).sum())
+
+
+class _RegexTokenizer:
+    """Tiny HF-call-compatible tokenizer for the demo (no transformers needed)."""
+
+    name_or_path = 'regex-crc32-30k'
+    pad_token_id = 0
+    _pattern = re.compile(r'\w+|[^\w\s]')
+
+    def __len__(self):
+        return 30_000
+
+    def __call__(self, texts, truncation=True, max_length=512, padding=False):
+        ids = [[1] + [zlib.crc32(w.encode()) % 29_998 + 2 for w in self._pattern.findall(t)][:max_length - 2] + [1]
+               for t in texts]
+        return {'input_ids': ids, 'attention_mask': [[1] * len(i) for i in ids]}
+
+
+def main():
+    """Time tokenizing vs. reopening the cache, and padding saved."""
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(10_000)]
+    lengths = np.clip(rng.lognormal(4.0, 0.9, size=100_000).astype(int), 5, 2_000)
+    texts = [' '.join(rng.choice(words, size=n)) for n in lengths]
+    labels = rng.integers(0, 2, size=len(texts)).tolist()
+    tokenizer = _RegexTokenizer()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        path = pretokenize(texts, labels, tokenizer, cache_dir, max_length=512)
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        path = pretokenize(texts, labels, tokenizer, cache_dir, max_length=512)
+        dataset = PretokenizedDataset(path)
+        batches = sum(1 for _ in dataset.batches(16, seed=1))
+        reopen = time.perf_counter() - start
+
+        real = int(dataset.lengths.sum())
+        dynamic = dataset.padded_tokens(16)
+        print(f"{len(texts):,} texts: tokenize + write {first:.1f} s, "
+              f"cached open + one epoch of {batches:,} batches {reopen:.1f} s")
+        print(f"tokens per epoch: padded to max_length {len(texts) * 512:,}, "
+              f"dynamic length-sorted {dynamic:,} (real {real:,}, {dynamic / real:.3f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
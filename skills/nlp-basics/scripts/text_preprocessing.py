@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+High-throughput text preprocessing for the nlp-basics skill.
+The TextPreprocessor in the skill and NLP agent calls re.sub with
+uncompiled patterns three times per text, runs NLTK's word_tokenize, and
+lemmatizes every token through WordNet with no memoization.
+batch_preprocess is a serial list comprehension.
+
+This version:
+
+- compiles its patterns once and fuses URL, HTML-tag and special-character
+  removal into a single regex pass;
+- tokenizes with one compiled regex (word_tokenize is still available via
+  tokenizer=);
+- filters stop words and lemmatizes in one pass through a bounded LRU of
+  token -> lemma, since vocabularies follow Zipf's law and almost every
+  lookup is a hit;
+- splits batches into chunks on a process pool. Each worker builds its
+  preprocessor (and lemma cache) once in a pool initializer, and
+  preprocess_stream keeps a bounded number of chunks in flight, so corpora
+  of millions of documents stream through.
+"""
+
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+# One pass for what clean_text did in three re.sub calls (URLs, HTML tags,
+# anything but word characters, whitespace and .,!?)
+STRIP_PATTERN = re.compile(r'http\S+|www\S+|<[^>]*>|[^\w\s.,!?]')
+# Decimal numbers stay whole, as with word_tokenize; punctuation splits off
+TOKEN_PATTERN = re.compile(r'\d+(?:[.,]\d+)+|\w+|[.,!?]')
+
+
+def _load_nltk():
+    import nltk
+
+    for path, resource in (('tokenizers/punkt', 'punkt'), ('corpora/stopwords', 'stopwords'),
+                           ('corpora/wordnet', 'wordnet')):
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(resource, quiet=True)
+
+
+class TextPreprocessor:
+    """Production text preprocessing pipeline (precompiled, memoized, parallel)."""
+
+    def __init__(self, remove_stopwords=True, lemmatize=True, lowercase=True,
+                 lemma_cache_size=200_000, stop_words=None, tokenizer=None):
+        """
+        Args:
+            remove_stopwords: Drop stop words
+            lemmatize: Lemmatize tokens with WordNet
+            lowercase: Lowercase before tokenizing
+            lemma_cache_size: Max entries in the token -> lemma LRU
+            stop_words: Stop word collection (default: NLTK English)
+            tokenizer: Callable str -> list of tokens (default: the compiled
+                TOKEN_PATTERN; pass nltk.word_tokenize for exact NLTK output)
+        """
+        self.remove_stopwords = remove_stopwords
+        self.lemmatize = lemmatize
+        self.lowercase = lowercase
+        self.lemma_cache_size = lemma_cache_size
+        self.tokenizer = tokenizer
+
+        if (remove_stopwords and stop_words is None) or lemmatize:
+            _load_nltk()
+        if stop_words is None and remove_stopwords:
+            from nltk.corpus import stopwords
+            stop_words = stopwords.words('english')
+        self.stop_words = frozenset(stop_words or ())
+
+        if lemmatize:
+            from nltk.stem import WordNetLemmatizer
+            self._lemma = lru_cache(maxsize=lemma_cache_size)(WordNetLemmatizer().lemmatize)
+        else:
+            self._lemma = None
+        self._tokenize = tokenizer or TOKEN_PATTERN.findall
+
+    def __getstate__(self):
+        # lru_cache wrappers and bound methods don't pickle; workers rebuild
+        return {'remove_stopwords': self.remove_stopwords, 'lemmatize': self.lemmatize,
+                'lowercase': self.lowercase, 'lemma_cache_size': self.lemma_cache_size,
+                'stop_words': self.stop_words, 'tokenizer': self.tokenizer}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def clean_text(self, text: str) -> str:
+        """Basic text cleaning (one regex pass plus whitespace normalization)."""
+        return ' '.join(STRIP_PATTERN.sub('', text).split())
+
+    def preprocess(self, text: str) -> str:
+        """Full preprocessing pipeline."""
+        # Whitespace normalization is skipped: tokenizing ignores it anyway
+        text = STRIP_PATTERN.sub('', text)
+        if self.lowercase:
+            text = text.lower()
+        tokens = self._tokenize(text)
+
+        stop_words = self.stop_words if self.remove_stopwords else ()
+        lemma = self._lemma
+        if lemma is not None:
+            return ' '.join([lemma(t) for t in tokens if t not in stop_words])
+        if stop_words:
+            return ' '.join([t for t in tokens if t not in stop_words])
+        return ' '.join(tokens)
+
+    def lemma_cache_info(self):
+        return self._lemma.cache_info() if self._lemma is not None else None
+
+    def preprocess_stream(self, texts: Iterable[str], n_jobs=None, chunksize=2_000) -> Iterator[str]:
+        """
+        Preprocess an iterable of texts in order, chunked across processes.
+
+        Args:
+            texts: Any iterable (a generator over a file is fine)
+            n_jobs: Worker processes (default: os.cpu_count(); 1 = in-process)
+            chunksize: Texts per task
+
+        Yields:
+            str: Preprocessed texts, in input order
+        """
+        n_jobs = n_jobs or os.cpu_count() or 1
+        texts = iter(texts)
+        if n_jobs == 1:
+            for text in texts:
+                yield self.preprocess(text)
+            return
+
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(self.__getstate__(),)) as pool:
+            pending = deque()
+            # Bounded look-ahead: never more than 2 chunks per worker in flight
+            while True:
+                while len(pending) < 2 * n_jobs:
+                    chunk = list(islice(texts, chunksize))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(_preprocess_chunk, chunk))
+                if not pending:
+                    return
+                yield from pending.popleft().result()
+
+    def batch_preprocess(self, texts: List[str], n_jobs=None, chunksize=2_000) -> List[str]:
+        """Process multiple texts (in parallel when the batch is large enough)."""
+        if len(texts) <= chunksize:
+            n_jobs = 1
+        return list(self.preprocess_stream(texts, n_jobs, chunksize))
+
+
+_worker = None
+
+
+def _init_worker(state):
+    global _worker
+    _worker = TextPreprocessor(**state)
+
+
+def _preprocess_chunk(chunk):
+    return [_worker.preprocess(text) for text in chunk]
+
+
+def _preprocess_original(text, stop_words):
+    """The skill's original clean_text + tokenize path, for timing."""
+    text = re.sub(r'http\S+|www\S+', '', text)
+    text = re.sub(r'<.*?>', '', text)
+    text = re.sub(r'[^\w\s.,!?]', '', text)
+    text = ' '.join(text.split()).strip().lower()
+    return ' '.join(t for t in re.findall(r'\d+(?:[.,]\d+)+|\w+|[.,!?]', text) if t not in stop_words)
+
+
+def main():
+    """Time serial, fused and parallel preprocessing on a synthetic corpus."""
+    import random
+
+    try:
+        import nltk  # noqa: F401
+        options = {}
+    except ImportError:
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        print("nltk not installed: sklearn stop words, no lemmatization")
+        options = {'stop_words': ENGLISH_STOP_WORDS, 'lemmatize': False}
+
+    rng = random.Random(0)
+    vocab = ['model', 'models', 'running', 'data', 'the', 'a', 'is', 'training', 'cats',
+             'learning', 'of', 'and', 'results', 'better', 'networks', 'token', 'was']
+    extras = ['<b>', '</b>', 'https://example.com/x?id=1', '#tag', '@user', '3.14', '!', ',']
+    docs = [' '.join(rng.choice(vocab if rng.random() < 0.85 else extras) for _ in range(60))
+            for _ in range(100_000)]
+
+    preprocessor = TextPreprocessor(**options)
+    stop_words = preprocessor.stop_words
+
+    start = time.perf_counter()
+    baseline = [_preprocess_original(d, stop_words) for d in docs[:20_000]]
+    original_time = (time.perf_counter() - start) / 20_000
+
+    start = time.perf_counter()
+    fused = [preprocessor.preprocess(d) for d in docs[:20_000]]
+    fused_time = (time.perf_counter() - start) / 20_000
+
+    start = time.perf_counter()
+    parallel = preprocessor.batch_preprocess(docs)
+    parallel_time = (time.perf_counter() - start) / len(docs)
+
+    assert parallel[:20_000] == fused
+    mismatches = sum(a != b for a, b in zip(baseline, fused))
+    print(f"original regex path: {original_time * 1e6:.1f} µs/doc")
+    print(f"fused single pass:   {fused_time * 1e6:.1f} µs/doc ({mismatches} outputs differ)")
+    print(f"process pool ({os.cpu_count()} cpus): {parallel_time * 1e6:.1f} µs/doc")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Exact top-k vector search for the nlp-basics skill.
+SemanticSearch.search and EmbeddingEngine.semantic_search score the whole
+corpus, recompute corpus norms on every call, and np.argsort all scores to
+keep top_k of them. VectorIndex L2-normalizes vectors once, when they are
+added, and stores them in one contiguous matrix (float32, or float16 for
+half the memory). Cosine similarity then reduces to a dot product.
+
+A batch of queries is answered chunk by chunk: one (queries x chunk)
+matrix multiply, then np.argpartition for each chunk's top-k, merged into a
+running top-k. Peak scratch memory is queries x chunk_size floats however
+large the corpus is. Saved indexes reopen memory-mapped.
+
+float16 storage halves memory, but each chunk has to be widened to float32
+for BLAS. That widening costs more than the matrix multiply, so float16
+pays off only when queries are batched.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+
+def l2_normalize(x, eps=1e-12):
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), eps)
+
+
+def merge_topk(scores, indices, k):
+    """Keep the k best (score, index) columns per row, unsorted."""
+    if scores.shape[1] <= k:
+        return scores, indices
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, part, axis=1), np.take_along_axis(indices, part, axis=1)
+
+
+class VectorIndex:
+    """Normalized embedding matrix with chunked, batched exact top-k search."""
+
+    def __init__(self, dim, dtype=np.float32, chunk_size=16_384, initial_capacity=1024):
+        """
+        Args:
+            dim: Embedding dimension
+            dtype: Storage dtype (np.float32 or np.float16)
+            chunk_size: Corpus rows scored per matrix multiply
+            initial_capacity: Rows preallocated before the first add
+        """
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+        self._vectors = np.empty((initial_capacity, dim), dtype=self.dtype)
+        self.count = 0
+        self.documents = []
+
+    @property
+    def vectors(self):
+        return self._vectors[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def add(self, embeddings, documents=None):
+        """Normalize and append embeddings (with optional payload documents)."""
+        embeddings = l2_normalize(embeddings).reshape(-1, self.dim)
+        needed = self.count + len(embeddings)
+        if needed > len(self._vectors):
+            grown = np.empty((max(needed, 2 * len(self._vectors)), self.dim), dtype=self.dtype)
+            grown[:self.count] = self._vectors[:self.count]
+            self._vectors = grown
+        self._vectors[self.count:needed] = embeddings
+        self.count = needed
+        if documents is not None:
+            self.documents.extend(documents)
+        return self
+
+    def search_batch(self, queries, top_k=5):
+        """
+        Top-k by cosine similarity for a batch of queries.
+
+        Args:
+            queries: (n_queries, dim) or (dim,) array (normalized here)
+            top_k: Results per query
+
+        Returns:
+            tuple: (scores, indices), each (n_queries, top_k), best first
+        """
+        queries = l2_normalize(queries).reshape(-1, self.dim)
+        top_k = min(top_k, self.count)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_indices = np.empty((len(queries), 0), dtype=np.int64)
+        if top_k == 0:
+            return best_scores, best_indices
+
+        # float16 rows are widened into one reused float32 buffer (BLAS has
+        # no half-precision GEMM, and a fresh copy per chunk page-faults)
+        buffer = None
+        if self._vectors.dtype != np.float32:
+            buffer = np.empty((min(self.chunk_size, self.count), self.dim), dtype=np.float32)
+        for start in range(0, self.count, self.chunk_size):
+            chunk = self._vectors[start:min(start + self.chunk_size, self.count)]
+            if buffer is not None:
+                np.copyto(buffer[:len(chunk)], chunk)
+                chunk = buffer[:len(chunk)]
+            scores = queries @ chunk.T
+            k = min(top_k, scores.shape[1])
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores, best_indices = merge_topk(
+                np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1),
+                np.concatenate([best_indices, part + start], axis=1),
+                top_k,
+            )
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_indices, order, axis=1)
+
+    def search(self, query, top_k=5):
+        """SemanticSearch.search shape: [(document or row id, score), ...]."""
+        scores, indices = self.search_batch(query, top_k)
+        return [(self.documents[i] if self.documents else int(i), float(s))
+                for i, s in zip(indices[0], scores[0])]
+
+    def save(self, path):
+        """Write vectors.npy (+ documents.json) to a directory."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'vectors.npy'), self.vectors)
+        with open(os.path.join(path, 'index.json'), 'w') as f:
+            json.dump({'dim': self.dim, 'dtype': self.dtype.name, 'count': self.count,
+                       'chunk_size': self.chunk_size}, f)
+        if self.documents:
+            with open(os.path.join(path, 'documents.json'), 'w') as f:
+                json.dump(self.documents, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a saved index; vectors are memory-mapped (read-only) by default."""
+        with open(os.path.join(path, 'index.json'), 'r') as f:
+            meta = json.load(f)
+        index = cls(meta['dim'], meta['dtype'], meta['chunk_size'], initial_capacity=0)
+        index._vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r' if mmap else None)
+        index.count = meta['count']
+        documents_path = os.path.join(path, 'documents.json')
+        if os.path.exists(documents_path):
+            with open(documents_path, 'r') as f:
+                index.documents = json.load(f)
+        return index
+
+
+def _argsort_search(corpus, query, top_k):
+    """The skill's original path: full scores, norms every call, full argsort."""
+    scores = corpus @ query / (np.linalg.norm(corpus, axis=1) * np.linalg.norm(query))
+    top = np.argsort(scores)[-top_k:][::-1]
+    return top, scores[top]
+
+
+def main():
+    """Benchmark exact search against the argsort path at 1M vectors."""
+    parser = argparse.ArgumentParser(description="Vector index benchmark")
+    parser.add_argument('--n', type=int, default=1_000_000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=32)
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = np.empty((args.n, args.dim), dtype=np.float32)
+    for start in range(0, args.n, 100_000):
+        stop = min(start + 100_000, args.n)
+        corpus[start:stop] = rng.standard_normal((stop - start, args.dim), dtype=np.float32)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    start = time.perf_counter()
+    for query in queries[:4]:
+        reference, _ = _argsort_search(corpus, query, args.top_k)
+    baseline = (time.perf_counter() - start) / 4
+    print(f"{args.n:,} x {args.dim}: argsort path {baseline * 1000:.0f} ms/query")
+
+    for dtype in (np.float32, np.float16):
+        index = VectorIndex(args.dim, dtype=dtype, initial_capacity=args.n)
+        for start in range(0, args.n, 100_000):
+            index.add(corpus[start:start + 100_000])
+        _, indices = index.search_batch(queries[:1], args.top_k)  # warm-up
+
+        start = time.perf_counter()
+        index.search_batch(queries[:1], args.top_k)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, indices = index.search_batch(queries, args.top_k)
+        batched = (time.perf_counter() - start) / len(queries)
+
+        reference, _ = _argsort_search(corpus, queries[-1], args.top_k)
+        overlap = len(set(reference) & set(indices[-1])) / args.top_k
+        print(f"{np.dtype(dtype).name:>8}: single query {single * 1000:.0f} ms, "
+              f"batch of {len(queries)} {batched * 1000:.1f} ms/query, "
+              f"top-{args.top_k} agreement {overlap:.0%}, {index.vectors.nbytes / 2**20:.0f} MiB")
+        del index
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
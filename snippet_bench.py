@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Snippet performance benchmarks with regression tracking.
+Runs the SKILL.md snippets listed under 'benchmark' in each skill's
+assets/config.yaml against synthetic data at several sizes, records wall time
+and peak RSS to a local history file, and fails when a content change makes a
+snippet slower (or hungrier) than the configured threshold.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+import yaml
+
+from snippet_harness import assemble_prelude, discover, extract_snippets
+
+HISTORY_PATH = Path('.snippet_bench_history.jsonl')
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_TIMEOUT = 600.0
+DEFAULT_REPEAT = 3
+RESULT_MARKER = '@@BENCH '
+
+# Synthetic data generators; each binds X (and y) for n rows
+GENERATORS = {
+    'blobs': '''
+_rng = np.random.default_rng(42)
+_centers = _rng.normal(scale=10.0, size=(5, {n_features}))
+y = _rng.integers(0, 5, size={n})
+X = _centers[y] + _rng.normal(size=({n}, {n_features}))
+''',
+    'classification': '''
+_rng = np.random.default_rng(42)
+X = _rng.normal(size=({n}, {n_features}))
+_w = _rng.normal(size={n_features})
+y = (X @ _w + _rng.normal(scale=0.5, size={n}) > 0).astype(int)
+''',
+}
+
+_RUNNER = '''
+import json as _json
+import time as _time
+import resource as _resource
+import sys as _sys
+import numpy as np
+
+{prelude}
+
+{data}
+
+_code = compile({code!r}, {name!r}, 'exec')
+_call = compile({call!r}, {name!r} + ':call', 'eval') if {call!r} else None
+_base = dict(globals())
+_times = []
+for _ in range({repeat}):
+    _ns = dict(_base)
+    _start = _time.perf_counter()
+    exec(_code, _ns)
+    if _call is not None:
+        eval(_call, _ns)
+    _times.append(_time.perf_counter() - _start)
+
+_rss = _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss
+_rss_mb = _rss / (1024 * 1024) if _sys.platform == 'darwin' else _rss / 1024
+_times.sort()
+print({marker!r} + _json.dumps({{'wall_s': _times[len(_times) // 2], 'min_s': _times[0], 'peak_rss_mb': _rss_mb}}))
+'''
+
+
+def load_benchmarks(skill_md: Path) -> Optional[dict]:
+    """
+    Read the 'benchmark' section of a skill's config.yaml.
+
+    Args:
+        skill_md: Path to the skill's SKILL.md
+
+    Returns:
+        dict: Benchmark settings, or None when the skill defines none
+    """
+    config_path = skill_md.parent / 'assets' / 'config.yaml'
+    if not config_path.exists():
+        return None
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f) or {}
+    return config.get('benchmark')
+
+
+def build_cases(skill_md: Path, settings: dict, sizes: Optional[List[int]] = None, repeat: int = DEFAULT_REPEAT) -> List[dict]:
+    """
+    Expand a skill's benchmark settings into runnable cases.
+
+    Args:
+        skill_md: Path to the skill's SKILL.md
+        settings: 'benchmark' section from config.yaml
+        sizes: Override for the row counts to run
+        repeat: Timed repetitions per case (median is reported)
+
+    Returns:
+        list: Cases with 'key', 'snippet_sha', 'source' and threshold
+    """
+    snippets = extract_snippets(skill_md)
+    cases = []
+
+    for spec in settings.get('snippets', []):
+        matches = [i for i, s in enumerate(snippets) if s.heading == spec['heading']]
+        if not matches:
+            raise ValueError(f"{skill_md}: no Python block under heading {spec['heading']!r}")
+        index = matches[0]
+        snippet = snippets[index]
+        generator = GENERATORS[spec.get('data', 'blobs')]
+        n_features = spec.get('n_features', 10)
+        call = spec.get('call', '')
+
+        for n in sizes or spec.get('sizes') or settings.get('sizes') or DEFAULT_SIZES:
+            source = _RUNNER.format(
+                prelude=assemble_prelude(snippets[:index]),
+                data=generator.format(n=n, n_features=n_features),
+                code=snippet.code,
+                call=call,
+                name=snippet.name,
+                repeat=repeat,
+                marker=RESULT_MARKER,
+            )
+            cases.append({
+                'key': f"{snippet.name}@{n}",
+                'snippet': snippet.name,
+                'rows': n,
+                'snippet_sha': snippet.sha256,
+                'threshold': spec.get('threshold', settings.get('threshold', DEFAULT_THRESHOLD)),
+                'source': source,
+            })
+    return cases
+
+
+def run_case(case: dict, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """
+    Time one case in a fresh interpreter.
+
+    Args:
+        case: Case from build_cases
+        timeout: Seconds before the process is killed
+
+    Returns:
+        dict: 'status' (ok|failed|skipped|timeout) plus wall_s/peak_rss_mb when ok
+    """
+    env = dict(os.environ, PYTHONHASHSEED='0', MPLBACKEND='Agg', PYTHONDONTWRITEBYTECODE='1')
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        script = Path(workdir) / 'bench.py'
+        script.write_text(case['source'], encoding='utf-8')
+        try:
+            proc = subprocess.run(
+                [sys.executable, str(script)],
+                cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return {'status': 'timeout', 'detail': f"exceeded {timeout:g}s"}
+
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            return dict(json.loads(line[len(RESULT_MARKER):]), status='ok')
+
+    last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+    status = 'skipped' if last_line.startswith('ModuleNotFoundError') else 'failed'
+    return {'status': status, 'detail': last_line}
+
+
+def load_history(path: Path = HISTORY_PATH) -> dict:
+    """Latest accepted record per case key (successful and not a regression)."""
+    latest = {}
+    if path.exists():
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    # A regressed record must not become the next baseline
+                    if record.get('status') == 'ok' and not record.get('regressed'):
+                        latest[record['key']] = record
+    return latest
+
+
+def check_regression(record: dict, baseline: Optional[dict], threshold: float) -> List[str]:
+    """
+    Compare a fresh record with the previous one for the same case.
+
+    Only content changes are judged: re-running unchanged snippets measures
+    machine noise, not the snippet.
+
+    Args:
+        record: Fresh result
+        baseline: Last accepted (non-regressed) record, if any
+        threshold: Allowed relative slowdown (0.25 = 25%)
+
+    Returns:
+        list: Regression messages (empty when within budget)
+    """
+    if baseline is None or record['status'] != 'ok' or record['snippet_sha'] == baseline['snippet_sha']:
+        return []
+
+    regressions = []
+    for metric, unit in (('wall_s', 's'), ('peak_rss_mb', 'MB')):
+        old, new = baseline[metric], record[metric]
+        if old > 0 and new > old * (1 + threshold):
+            regressions.append(
+                f"{record['key']}: {metric} {old:.3f}{unit} -> {new:.3f}{unit} "
+                f"(+{(new / old - 1) * 100:.0f}%, budget {threshold * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main():
+    """Main benchmark entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='Skill names, skill directories or SKILL.md files')
+    parser.add_argument('--sizes', help='Comma-separated row counts (overrides config)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timed repetitions per case')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Per-case timeout (s)')
+    parser.add_argument('--threshold', type=float, default=None, help='Override allowed relative regression')
+    parser.add_argument('--history', default=str(HISTORY_PATH), help='History file (JSON lines)')
+    parser.add_argument('--no-record', action='store_true', help='Do not append results to the history')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')] if args.sizes else None
+    history_path = Path(args.history)
+    baselines = load_history(history_path)
+    regressions = []
+    records = []
+
+    for skill_md in discover(args.paths):
+        settings = load_benchmarks(skill_md)
+        if not settings:
+            continue
+        for case in build_cases(skill_md, settings, sizes=sizes, repeat=args.repeat):
+            result = run_case(case, timeout=args.timeout)
+            record = {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'key': case['key'],
+                'snippet': case['snippet'],
+                'rows': case['rows'],
+                'snippet_sha': case['snippet_sha'],
+                **result,
+            }
+            threshold = args.threshold if args.threshold is not None else case['threshold']
+            case_regressions = check_regression(record, baselines.get(case['key']), threshold)
+            record['regressed'] = bool(case_regressions)
+            regressions.extend(case_regressions)
+            records.append(record)
+
+            if record['status'] == 'ok':
+                print(f"⏱️  {case['key']}: {record['wall_s']:.4f}s, {record['peak_rss_mb']:.0f}MB peak RSS")
+            else:
+                print(f"⚠️  {case['key']}: {record['status']} - {record.get('detail', '')}")
+
+    if records and not args.no_record:
+        with open(history_path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+
+    if regressions:
+        print("\n❌ REGRESSIONS:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+
+    print(f"\n{len(records)} cases, no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Executable code-block harness for SKILL.md files.
+Extracts fenced Python blocks with their heading context, assembles each one
+into a runnable unit and executes the units in parallel, one fresh interpreter
+per unit, with a timeout. Results are cached by unit hash, which also covers
+the skill's scripts/ modules a unit imports, so only edited snippets (or
+snippets whose scripts changed) are re-run.
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_PATH = Path('.snippet_cache.json')
+DEFAULT_TIMEOUT = 60.0
+TEST_HEADING = 'Unit Test Template'
+
+_FENCE = re.compile(r'^(\s*)(`{3,}|~{3,})\s*([\w+-]*)')
+_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_MISSING_MODULE = re.compile(r"^ModuleNotFoundError: No module named '([\w.]+)'", re.MULTILINE)
+_UNDEFINED_NAME = re.compile(r"^NameError: name '(\w+)' is not defined")
+
+
+@dataclass(frozen=True)
+class Snippet:
+    """A fenced Python block and where it lives."""
+
+    source: str
+    index: int
+    line: int
+    headings: Tuple[str, ...]
+    code: str
+
+    @property
+    def skill(self) -> str:
+        path = Path(self.source)
+        return path.parent.name if path.name == 'SKILL.md' else path.stem
+
+    @property
+    def heading(self) -> str:
+        return self.headings[-1] if self.headings else ''
+
+    @property
+    def kind(self) -> str:
+        """'test', 'exercise' (comments only) or 'example'."""
+        if any(TEST_HEADING in h for h in self.headings):
+            return 'test'
+        if not any(l.strip() and not l.strip().startswith('#') for l in self.code.splitlines()):
+            return 'exercise'
+        return 'example'
+
+    @property
+    def name(self) -> str:
+        slug = re.sub(r'[^a-z0-9]+', '-', self.heading.lower()).strip('-') or 'top'
+        return f"{self.skill}:{self.index:02d}:{slug}"
+
+    @property
+    def sha256(self) -> str:
+        return hashlib.sha256(self.code.encode('utf-8')).hexdigest()
+
+
+def extract_snippets(md_path) -> List[Snippet]:
+    """
+    Extract fenced Python blocks from a markdown file.
+
+    Args:
+        md_path: Path to a markdown file
+
+    Returns:
+        list: Snippets in document order, with the heading path above each
+    """
+    lines = Path(md_path).read_text(encoding='utf-8').splitlines()
+    snippets = []
+    headings = []
+    fence = None
+    block = []
+    start = 0
+    lang = ''
+
+    for lineno, line in enumerate(lines, 1):
+        if fence is None:
+            match = _FENCE.match(line)
+            if match:
+                fence, lang, start, block = match.group(2), match.group(3).lower(), lineno + 1, []
+                continue
+            match = _HEADING.match(line)
+            if match:
+                level = len(match.group(1))
+                headings = headings[:level - 1] + [''] * max(0, level - 1 - len(headings))
+                headings.append(match.group(2))
+        elif line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+            if lang in ('python', 'py', 'python3'):
+                snippets.append(Snippet(
+                    source=str(md_path),
+                    index=len(snippets),
+                    line=start,
+                    headings=tuple(h for h in headings if h),
+                    code='\n'.join(block) + '\n',
+                ))
+            fence = None
+        else:
+            block.append(line)
+
+    return snippets
+
+
+def _prelude_statements(code: str) -> List[str]:
+    """Imports and undecorated top-level definitions a later block may rely on."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+
+    statements = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            statements.append(ast.unparse(node))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if not node.decorator_list and not node.name.startswith('test_'):
+                statements.append(ast.unparse(node))
+    return statements
+
+
+_TEST_FOOTER = '''
+
+def __run_tests():
+    import traceback
+    errors = []
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            try:
+                fn()
+                print(f'PASS {name}')
+            except Exception as e:
+                print(f'FAIL {name}')
+                traceback.print_exc()
+                errors.append(e)
+    if errors:
+        raise errors[0]
+
+__run_tests()
+'''
+
+
+def assemble_prelude(preceding: List[Snippet]) -> str:
+    """
+    Replay imports and plain definitions from earlier blocks.
+
+    Each statement is guarded, so one unavailable import does not sink every
+    later block.
+
+    Args:
+        preceding: Earlier snippets from the same file
+
+    Returns:
+        str: Python source for the prelude
+    """
+    seen = set()
+    prelude = []
+    for earlier in preceding:
+        for statement in _prelude_statements(earlier.code):
+            if statement in seen:
+                continue
+            seen.add(statement)
+            body = '\n'.join('    ' + l for l in statement.splitlines())
+            prelude.append(f"try:\n{body}\nexcept Exception:\n    pass")
+    return '\n'.join(prelude)
+
+
+def scripts_path_setup(md_path) -> str:
+    """Source putting the skill's scripts/ directory on sys.path ('' if it has none)."""
+    scripts = Path(md_path).resolve().parent / 'scripts'
+    if not scripts.is_dir():
+        return ''
+    return f"import sys as _sys\n_sys.path.insert(0, {str(scripts)!r})"
+
+
+def _imported_modules(code: str) -> List[str]:
+    """Top-level module names imported anywhere in a block of source."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module.split('.')[0])
+    return modules
+
+
+def scripts_digest(md_path, code: str) -> str:
+    """
+    Hash of the skill's scripts/ modules that code imports, followed transitively.
+
+    Args:
+        md_path: SKILL.md the code comes from
+        code: Python source (a unit or template)
+
+    Returns:
+        str: Hex digest ('' when no scripts/ module is imported)
+    """
+    scripts = Path(md_path).resolve().parent / 'scripts'
+    sources = {}
+    pending = _imported_modules(code)
+    while pending:
+        name = pending.pop()
+        path = scripts / f"{name}.py"
+        if name in sources or not path.is_file():
+            continue
+        sources[name] = path.read_bytes()
+        pending.extend(_imported_modules(sources[name].decode('utf-8')))
+    if not sources:
+        return ''
+    h = hashlib.sha256()
+    for name in sorted(sources):
+        h.update(name.encode('utf-8') + b'\0' + sources[name] + b'\0')
+    return h.hexdigest()
+
+
+def _guarded_imports(unit: str) -> set:
+    """Names bound by the prelude's try-guarded imports, which fail silently."""
+    names = set()
+    for node in ast.parse(unit).body:
+        if isinstance(node, ast.Try):
+            for statement in node.body:
+                if isinstance(statement, (ast.Import, ast.ImportFrom)):
+                    names.update(alias.asname or alias.name.split('.')[0] for alias in statement.names)
+    return names
+
+
+def assemble_unit(snippet: Snippet, preceding: List[Snippet]) -> str:
+    """
+    Build a self-contained script for a snippet.
+
+    The prelude from earlier blocks in the same file is replayed first. Unit
+    Test Template blocks get a footer that calls every test_* function.
+
+    Args:
+        snippet: Snippet to run
+        preceding: Earlier snippets from the same file
+
+    Returns:
+        str: Python source for the unit
+    """
+    parts = [f"# {snippet.name} ({snippet.source}:{snippet.line})",
+             scripts_path_setup(snippet.source), assemble_prelude(preceding)]
+    parts.append(snippet.code)
+    if snippet.kind == 'test':
+        parts.append(_TEST_FOOTER)
+    return '\n'.join(parts)
+
+
+def build_units(md_path) -> List[Tuple[Snippet, str]]:
+    """Extract and assemble every runnable snippet in a markdown file."""
+    snippets = extract_snippets(md_path)
+    return [
+        (snippet, assemble_unit(snippet, snippets[:i]))
+        for i, snippet in enumerate(snippets)
+        if snippet.kind != 'exercise'
+    ]
+
+
+def unit_key(unit: str, md_path=None) -> str:
+    """Cache key for an assembled unit (and the scripts/ it imports) under the current interpreter."""
+    tag = f"{sys.version_info.major}.{sys.version_info.minor}\0"
+    if md_path is not None:
+        tag += scripts_digest(md_path, unit) + '\0'
+    return hashlib.sha256((tag + unit).encode('utf-8')).hexdigest()
+
+
+def run_unit(unit: str, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """
+    Execute a unit in a fresh interpreter inside a scratch directory.
+
+    Args:
+        unit: Python source from assemble_unit
+        timeout: Seconds before the process is killed
+
+    Returns:
+        dict: 'status' (passed|failed|skipped|timeout), 'duration_s', 'detail'
+    """
+    env = dict(os.environ, PYTHONHASHSEED='0', MPLBACKEND='Agg', PYTHONDONTWRITEBYTECODE='1')
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix='snippet-') as workdir:
+        script = Path(workdir) / 'unit.py'
+        script.write_text(unit, encoding='utf-8')
+        try:
+            proc = subprocess.run(
+                [sys.executable, str(script)],
+                cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return {
+                'status': 'timeout',
+                'duration_s': time.perf_counter() - start,
+                'detail': f"exceeded {timeout:g}s",
+            }
+
+    duration = time.perf_counter() - start
+    if proc.returncode == 0:
+        return {'status': 'passed', 'duration_s': duration, 'detail': ''}
+
+    stderr = proc.stderr.strip()
+    last_line = stderr.splitlines()[-1] if stderr else f"exit code {proc.returncode}"
+    missing = _MISSING_MODULE.match(last_line)
+    if missing:
+        return {'status': 'skipped', 'duration_s': duration, 'detail': f"missing module {missing.group(1)}"}
+    undefined = _UNDEFINED_NAME.match(last_line)
+    if undefined and undefined.group(1) in _guarded_imports(unit):
+        # The prelude import providing it failed, e.g. an optional package is not installed
+        return {'status': 'skipped', 'duration_s': duration,
+                'detail': f"import providing {undefined.group(1)!r} is not installed"}
+    return {'status': 'failed', 'duration_s': duration, 'detail': last_line}
+
+
+class SnippetCache:
+    """JSON-backed result cache keyed by unit hash."""
+
+    def __init__(self, path: Optional[Path] = CACHE_PATH):
+        self.path = Path(path) if path else None
+        self.entries = {}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def put(self, key: str, result: dict):
+        # Timeouts depend on machine load, so they are always retried
+        if result['status'] != 'timeout':
+            self.entries[key] = result
+
+    def save(self):
+        if self.path:
+            with open(self.path, 'w') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+
+
+def discover(paths: List[str]) -> List[Path]:
+    """Expand skill names, directories and files into SKILL.md paths."""
+    if not paths:
+        return sorted(Path('skills').glob('*/SKILL.md'))
+
+    found = []
+    for entry in paths:
+        path = Path(entry)
+        if path.is_file():
+            found.append(path)
+        elif (path / 'SKILL.md').is_file():
+            found.append(path / 'SKILL.md')
+        elif Path('skills', entry, 'SKILL.md').is_file():
+            found.append(Path('skills', entry, 'SKILL.md'))
+        else:
+            raise FileNotFoundError(f"No SKILL.md for {entry}")
+    return found
+
+
+def run_snippets(md_paths, jobs=None, timeout=DEFAULT_TIMEOUT, cache=None, kinds=None) -> List[dict]:
+    """
+    Run every snippet in the given markdown files.
+
+    Args:
+        md_paths: Markdown files to scan
+        jobs: Parallel interpreters (default: CPU count)
+        timeout: Per-unit timeout in seconds
+        cache: SnippetCache, or None to always run
+        kinds: Optional set of snippet kinds to include
+
+    Returns:
+        list: One result dict per snippet, in document order
+    """
+    units = []
+    for md_path in md_paths:
+        for snippet, unit in build_units(md_path):
+            if kinds is None or snippet.kind in kinds:
+                units.append((snippet, unit, unit_key(unit, snippet.source)))
+
+    results = [None] * len(units)
+    pending = []
+    for i, (snippet, unit, key) in enumerate(units):
+        cached = cache.get(key) if cache else None
+        if cached:
+            results[i] = dict(cached, cached=True)
+        else:
+            pending.append(i)
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        futures = {i: pool.submit(run_unit, units[i][1], timeout) for i in pending}
+        for i, future in futures.items():
+            result = future.result()
+            if cache:
+                cache.put(units[i][2], result)
+            results[i] = dict(result, cached=False)
+
+    for (snippet, _, key), result in zip(units, results):
+        result.update(name=snippet.name, kind=snippet.kind, location=f"{snippet.source}:{snippet.line}", key=key)
+
+    if cache:
+        cache.save()
+    return results
+
+
+def main():
+    """Main harness entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='Skill names, skill directories or markdown files')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Parallel interpreters')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Per-snippet timeout (s)')
+    parser.add_argument('--kind', action='append', choices=['example', 'test'], help='Only run these kinds')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not update the cache')
+    parser.add_argument('--strict', action='store_true', help='Treat skipped snippets as failures')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else SnippetCache()
+    results = run_snippets(
+        discover(args.paths), jobs=args.jobs, timeout=args.timeout,
+        cache=cache, kinds=set(args.kind) if args.kind else None,
+    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        icons = {'passed': '✅', 'failed': '❌', 'skipped': '⏭️ ', 'timeout': '⏱️ '}
+        for result in results:
+            suffix = ' (cached)' if result['cached'] else ''
+            detail = f" - {result['detail']}" if result['detail'] else ''
+            print(f"{icons[result['status']]} {result['name']}{suffix}{detail}")
+
+    counts = {s: sum(r['status'] == s for r in results) for s in ('passed', 'failed', 'skipped', 'timeout')}
+    print(f"\n{len(results)} snippets: " + ', '.join(f"{n} {s}" for s, n in counts.items()))
+
+    bad = counts['failed'] + counts['timeout'] + (counts['skipped'] if args.strict else 0)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())